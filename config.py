@@ -6,6 +6,56 @@ BASE_DIR = Path(__file__).resolve().parent
 DATABASE_PATH = os.path.join(BASE_DIR, 'school_database.db')
 RESOURCES_PATH = os.path.join(BASE_DIR, 'resources')
 
+# إعدادات اتصال قاعدة البيانات (تطبق على كل اتصال جديد بالترتيب)
+# ملاحظة: وضع WAL يتطلب أن تكون قاعدة البيانات على قرص محلي،
+# عند استضافتها على مجلد شبكة مشترك استخدم 'DELETE' بدلاً منه
+DATABASE_PRAGMAS = {
+    'busy_timeout': 5000,        # انتظار القفل بالمللي ثانية بدلاً من "database is locked"
+    'journal_mode': 'WAL',       # السماح بالقراءة أثناء الكتابة
+    'synchronous': 'NORMAL',     # آمن مع WAL وأسرع من FULL
+    'cache_size': -32000,        # حجم ذاكرة التخزين المؤقت بالكيلوبايت (قيمة سالبة)
+    'mmap_size': 268435456,      # 256 ميغابايت للقراءة عبر الذاكرة المعينة
+    'temp_store': 'MEMORY'       # الجداول والفهارس المؤقتة في الذاكرة
+}
+
+# النسخ الاحتياطي أثناء العمل: عدد الصفحات المنسوخة في كل خطوة والتوقف بين
+# الخطوات (بالثواني) حتى تستمر الكتابة من الشاشات الأخرى
+# (اللقطة المتسقة دون منع الكتابة تتطلب وضع WAL)
+BACKUP_STEP_PAGES = 256
+BACKUP_STEP_SLEEP = 0.01
+
+# النسخ التلقائية التزايدية: عدد الصفحات في كل مقطع، ونسخة أساس كاملة
+# كل عدد من النسخ (والبقية فروق)، وعدد النسخ المحتفظ بها
+BACKUP_CHUNK_PAGES = 64
+BACKUP_FULL_EVERY = 24
+BACKUP_KEEP_SNAPSHOTS = 48
+
+# خوارزمية الضغط الافتراضية (قابلة للتغيير من إعدادات النسخ الاحتياطي):
+# 'stored' أو 'deflate-1' أو 'deflate-6' أو 'deflate-9' أو 'bz2' أو 'lzma'
+# للمقارنة على قاعدة البيانات الحالية: python -m utils.compression
+BACKUP_ARCHIVE_CODEC = 'deflate-6'
+BACKUP_AUTO_CODEC = 'deflate-1'
+
+# عدد الخيوط لحساب بصمات المقاطع عند التحقق من النسخ الاحتياطية
+BACKUP_VERIFY_WORKERS = 4
+
+# مهلة انتظار توقف الكتابة قبل تنفيذ البحث (بالمللي ثانية)
+SEARCH_DELAY_MS = 300
+
+# الصفحات التي تنشأ مسبقاً في وقت الخمول بعد ظهور النافذة الرئيسية
+# (مفاتيح القائمة الجانبية، مثل 'students' أو 'attendance')، القائمة الفارغة تعطلها
+PREFETCH_PAGES = ['students', 'attendance']
+PREFETCH_DELAY_MS = 1000
+
+# مدة صلاحية إحصائيات لوحة التحكم المخزنة (بالثواني)
+# الكتابة في الجداول تبطل الأرقام المتأثرة فوراً بغض النظر عن هذه المدة
+DASHBOARD_STATS_TTL = 300
+
+# مخططات لوحة التحكم: عدد الأيام في مخطط الحضور وأشهر بداية الفصول الدراسية
+# (توزيع الدرجات يعرض الفصل الحالي)
+DASHBOARD_ATTENDANCE_DAYS = 7
+TERM_START_MONTHS = (9, 2)
+
 # إعدادات اللغة
 LANGUAGES = {
     'ar': 'العربية',
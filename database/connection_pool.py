@@ -0,0 +1,127 @@
+"""
+مجمع اتصالات قاعدة البيانات المشترك
+اتصال واحد لكل خيط، وإعداد المخطط مرة واحدة لكل عملية
+"""
+
+import atexit
+import sqlite3
+import threading
+import weakref
+import config
+
+
+def connect(db_path=None, check_same_thread=True, factory=sqlite3.Connection):
+    """فتح اتصال بقاعدة البيانات وتطبيق إعدادات الاتصال من config"""
+    connection = sqlite3.connect(
+        db_path or config.DATABASE_PATH,
+        check_same_thread=check_same_thread,
+        factory=factory
+    )
+    connection.row_factory = sqlite3.Row
+    for name, value in config.DATABASE_PRAGMAS.items():
+        connection.execute(f"PRAGMA {name} = {value}")
+    return connection
+
+
+class PooledConnection(sqlite3.Connection):
+    """اتصال المجمع (يقبل المراجع الضعيفة بخلاف sqlite3.Connection)"""
+
+
+class ConnectionPool:
+    """مجمع اتصالات لقاعدة بيانات واحدة (اتصال لكل خيط)"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # إعداد المخطط بقفل مستقل حتى يستطيع الإعداد طلب اتصال من المجمع
+        self._schema_lock = threading.RLock()
+        # مراجع ضعيفة: اتصال الخيط المنتهي دون release يغلق مع متغيراته المحلية
+        # (معرفات الخيوط يعاد استخدامها فلا تصلح مفتاحاً)
+        self._connections = weakref.WeakSet()
+        self._schema_ready = False
+        self._created = 0
+        self._checkouts = 0
+
+    def get_connection(self):
+        """الحصول على اتصال الخيط الحالي (ينشأ عند أول طلب)"""
+        connection = getattr(self._local, 'connection', None)
+        with self._lock:
+            self._checkouts += 1
+            if connection is None:
+                # يسمح بإغلاق الاتصال من الخيط الرئيسي عند انتهاء العملية
+                connection = connect(
+                    self.db_path, check_same_thread=False, factory=PooledConnection
+                )
+                self._local.connection = connection
+                self._connections.add(connection)
+                self._created += 1
+        return connection
+
+    def release(self):
+        """إغلاق اتصال الخيط الحالي (لخيوط العمل قصيرة العمر)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            return
+        with self._lock:
+            self._connections.discard(connection)
+            self._local.connection = None
+        connection.close()
+
+    def ensure_schema(self, setup):
+        """تنفيذ إعداد المخطط مرة واحدة فقط طوال عمر العملية"""
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                setup()
+                self._schema_ready = True
+
+    def stats(self):
+        """إحصائيات المجمع"""
+        with self._lock:
+            return {
+                'db_path': self.db_path,
+                'open_connections': len(self._connections),
+                'connections_created': self._created,
+                'checkouts': self._checkouts,
+                'schema_ready': self._schema_ready
+            }
+
+    def close_all(self):
+        """إغلاق جميع اتصالات المجمع"""
+        with self._lock:
+            for connection in list(self._connections):
+                try:
+                    # تحديث إحصائيات الفهارس قبل الإغلاق (توصية SQLite)
+                    connection.execute("PRAGMA optimize")
+                except sqlite3.Error:
+                    pass
+                connection.close()
+            self._connections.clear()
+            self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None):
+    """الحصول على مجمع الاتصالات المشترك لقاعدة البيانات"""
+    db_path = db_path or config.DATABASE_PATH
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[db_path] = pool
+        return pool
+
+
+def close_all_pools():
+    """إغلاق جميع الاتصالات المفتوحة في كل المجمعات"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_all()
+
+
+atexit.register(close_all_pools)
@@ -0,0 +1,121 @@
+"""
+إحصائيات لوحة التحكم مع ذاكرة تخزين مؤقت
+تحسب الأرقام المطلوبة في استعلام واحد وتحفظ لمدة config.DASHBOARD_STATS_TTL،
+وتزيد المشغلات رقم إصدار الجدول عند كل كتابة فيه (من أي اتصال أو شاشة)
+فيعاد حساب الأرقام المعتمدة على الجداول المتغيرة فقط
+"""
+
+import threading
+import time
+from datetime import datetime
+import config
+
+# أرقام لوحة التحكم: المفتاح -> (الجدول الذي تعتمد عليه، استعلام القيمة)
+STATS = {
+    'total_students': (
+        'students', "SELECT COUNT(*) FROM students WHERE status = 'active'"
+    ),
+    'total_teachers': ('teachers', "SELECT COUNT(*) FROM teachers"),
+    'total_classes': ('classes', "SELECT COUNT(*) FROM classes"),
+    'total_subjects': ('subjects', "SELECT COUNT(*) FROM subjects"),
+    'attendance_rate': ('attendance', '''
+        SELECT IFNULL(100.0 * SUM(present) / SUM(total), 0)
+        FROM attendance_daily
+        WHERE date = :today
+    ''')
+}
+
+# الأعمدة التي يغير تحديثها الأرقام (الإضافة والحذف تغيرها دائماً)
+TRACKED_COLUMNS = {
+    'students': ('status',),
+    'teachers': (),
+    'classes': (),
+    'subjects': (),
+    'attendance': ('date', 'status')
+}
+
+
+def create_version_triggers(connection):
+    """جدول إصدارات الجداول ومشغلات زيادتها عند الكتابة"""
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS stats_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    for table, columns in TRACKED_COLUMNS.items():
+        connection.execute(
+            "INSERT OR IGNORE INTO stats_versions (table_name) VALUES (?)",
+            (table,)
+        )
+        events = ['INSERT', 'DELETE']
+        if columns:
+            events.append(f"UPDATE OF {', '.join(columns)}")
+        for event in events:
+            name = f"stats_{table}_{event.split()[0].lower()}"
+            connection.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}
+                BEGIN
+                    UPDATE stats_versions SET version = version + 1
+                    WHERE table_name = '{table}';
+                END
+            ''')
+
+
+class DashboardStats:
+    """ذاكرة مؤقتة لأرقام لوحة التحكم مشتركة بين شاشات العملية"""
+
+    def __init__(self, ttl=None):
+        self.ttl = config.DASHBOARD_STATS_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        # المفتاح -> (القيمة، وقت الحساب، إصدار الجدول عند الحساب)
+        self._entries = {}
+        self._today = None
+
+    def _is_fresh(self, key, versions, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        value, computed_at, version = entry
+        return now - computed_at < self.ttl and version == versions.get(STATS[key][0])
+
+    def get(self, connection):
+        """الأرقام الحالية، مع إعادة حساب القديمة منها فقط في استعلام واحد"""
+        versions = dict(connection.execute(
+            "SELECT table_name, version FROM stats_versions"
+        ).fetchall())
+        today = datetime.now().strftime('%Y-%m-%d')
+        now = time.monotonic()
+
+        with self._lock:
+            if today != self._today:
+                # نسبة الحضور لليوم الجديد
+                self._entries.pop('attendance_rate', None)
+                self._today = today
+
+            stale = [key for key in STATS if not self._is_fresh(key, versions, now)]
+            if stale:
+                columns = ', '.join(f"({STATS[key][1]}) AS {key}" for key in stale)
+                row = connection.execute(
+                    f"SELECT {columns}", {'today': today}
+                ).fetchone()
+                for key in stale:
+                    self._entries[key] = (row[key], now, versions.get(STATS[key][0]))
+
+            return {key: entry[0] for key, entry in self._entries.items()}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_dashboard_stats(db_path=None):
+    """الحصول على ذاكرة إحصائيات لوحة التحكم المشتركة لقاعدة البيانات"""
+    db_path = db_path or config.DATABASE_PATH
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = DashboardStats()
+            _caches[db_path] = cache
+        return cache
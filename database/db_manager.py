@@ -1,174 +1,34 @@
-import sqlite3
 import hashlib
-from datetime import datetime
-from config import DATABASE_PATH
+from database.connection_pool import get_pool
+from database.dashboard_stats import get_dashboard_stats
+from database.migrations import migrate
+from database.search import bm25_weights, match_query
+
+# أعمدة ترتيب قائمة الطلاب: المفتاح -> تعبير SQL
+# (الأعمدة الاختيارية بدون NULL حتى تعمل مقارنة الصفوف في ترقيم المفاتيح)
+STUDENT_SORT_COLUMNS = {
+    'student_id': 's.student_id',
+    'full_name': 's.full_name',
+    'date_of_birth': "IFNULL(s.date_of_birth, '')",
+    'gender': "IFNULL(s.gender, '')",
+    'class_name': "IFNULL(c.class_name, '')",
+    'phone': "IFNULL(s.phone, '')",
+    'parent_phone': "IFNULL(s.parent_phone, '')",
+    'address': "IFNULL(s.address, '')",
+    'enrollment_date': "IFNULL(s.enrollment_date, '')"
+}
 
 class DatabaseManager:
     def __init__(self):
-        self.connection = sqlite3.connect(DATABASE_PATH)
-        self.connection.row_factory = sqlite3.Row
+        # اتصال مشترك من المجمع بدلاً من اتصال جديد لكل شاشة
+        self.pool = get_pool()
+        self.connection = self.pool.get_connection()
         self.cursor = self.connection.cursor()
-        self.create_tables()
-        self.create_default_admin()
+        self.pool.ensure_schema(self.setup_schema)
     
-    def create_tables(self):
-        # جدول المستخدمين
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT NOT NULL,
-                full_name TEXT,
-                email TEXT,
-                phone TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # جدول الطلاب
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS students (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id TEXT UNIQUE NOT NULL,
-                full_name TEXT NOT NULL,
-                date_of_birth DATE,
-                gender TEXT,
-                address TEXT,
-                phone TEXT,
-                parent_phone TEXT,
-                class_id INTEGER,
-                enrollment_date DATE DEFAULT CURRENT_DATE,
-                status TEXT DEFAULT 'active',
-                FOREIGN KEY (class_id) REFERENCES classes (id)
-            )
-        ''')
-        
-        # جدول المعلمين
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS teachers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                teacher_id TEXT UNIQUE NOT NULL,
-                full_name TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                specialization TEXT,
-                hire_date DATE DEFAULT CURRENT_DATE,
-                user_id INTEGER,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # جدول الصفوف
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS classes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                class_name TEXT NOT NULL,
-                grade_level INTEGER,
-                section TEXT,
-                capacity INTEGER,
-                academic_year TEXT
-            )
-        ''')
-        
-        # جدول المواد
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS subjects (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                subject_name TEXT NOT NULL,
-                subject_code TEXT UNIQUE,
-                credits INTEGER,
-                description TEXT
-            )
-        ''')
-        
-        # جدول الدرجات
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS grades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER NOT NULL,
-                subject_id INTEGER NOT NULL,
-                exam_type TEXT,
-                score REAL,
-                max_score REAL,
-                date DATE DEFAULT CURRENT_DATE,
-                teacher_id INTEGER,
-                FOREIGN KEY (student_id) REFERENCES students (id),
-                FOREIGN KEY (subject_id) REFERENCES subjects (id),
-                FOREIGN KEY (teacher_id) REFERENCES teachers (id)
-            )
-        ''')
-        
-        # جدول الحضور
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS attendance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_id INTEGER NOT NULL,
-                date DATE NOT NULL,
-                status TEXT NOT NULL,
-                notes TEXT,
-                FOREIGN KEY (student_id) REFERENCES students (id),
-                UNIQUE(student_id, date)
-            )
-        ''')
-        
-        # جدول الجدول الدراسي
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS timetable (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                class_id INTEGER NOT NULL,
-                subject_id INTEGER NOT NULL,
-                teacher_id INTEGER NOT NULL,
-                day TEXT NOT NULL,
-                start_time TIME NOT NULL,
-                end_time TIME NOT NULL,
-                room TEXT,
-                FOREIGN KEY (class_id) REFERENCES classes (id),
-                FOREIGN KEY (subject_id) REFERENCES subjects (id),
-                FOREIGN KEY (teacher_id) REFERENCES teachers (id)
-            )
-        ''')
-        
-        # جدول الإشعارات
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sender_id INTEGER,
-                recipient_id INTEGER,
-                title TEXT NOT NULL,
-                message TEXT NOT NULL,
-                type TEXT,
-                is_read BOOLEAN DEFAULT 0,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (sender_id) REFERENCES users (id),
-                FOREIGN KEY (recipient_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # جدول ربط المعلمين بالمواد
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS teacher_subjects (
-                teacher_id INTEGER NOT NULL,
-                subject_id INTEGER NOT NULL,
-                PRIMARY KEY (teacher_id, subject_id),
-                FOREIGN KEY (teacher_id) REFERENCES teachers (id),
-                FOREIGN KEY (subject_id) REFERENCES subjects (id)
-            )
-        ''')
-        
-        self.connection.commit()
-    
-    def create_default_admin(self):
-        """إنشاء حساب مدير افتراضي"""
-        try:
-            password_hash = hashlib.sha256("admin123".encode()).hexdigest()
-            self.cursor.execute('''
-                INSERT OR IGNORE INTO users (username, password, role, full_name)
-                VALUES (?, ?, ?, ?)
-            ''', ('admin', password_hash, 'admin', 'مدير النظام'))
-            self.connection.commit()
-        except:
-            pass
+    def setup_schema(self):
+        """تطبيق ترحيلات المخطط غير المطبقة (مرة واحدة لكل عملية)"""
+        migrate(self.connection)
     
     def authenticate_user(self, username, password):
         """التحقق من بيانات المستخدم"""
@@ -211,6 +71,101 @@ class DatabaseManager:
         self.cursor.execute(query)
         return self.cursor.fetchall()
     
+    def get_student(self, student_id):
+        """الحصول على بيانات طالب واحد"""
+        row = self.cursor.execute('''
+            SELECT s.*, c.class_name
+            FROM students s
+            LEFT JOIN classes c ON s.class_id = c.id
+            WHERE s.id = ?
+        ''', (student_id,)).fetchone()
+        return dict(row) if row else None
+    
+    def student_code_exists(self, code):
+        """التحقق من وجود رقم طالب مسجل مسبقاً"""
+        row = self.cursor.execute(
+            "SELECT 1 FROM students WHERE student_id = ?", (code,)
+        ).fetchone()
+        return row is not None
+    
+    def _student_filters(self, search=None, class_id=None):
+        """شروط تصفية قائمة الطلاب النشطين ومعاملاتها"""
+        conditions = ["s.status = 'active'"]
+        params = []
+        if class_id is not None:
+            conditions.append("s.class_id = ?")
+            params.append(class_id)
+        query = match_query(search)
+        if query:
+            conditions.append(
+                "s.id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)"
+            )
+            params.append(query)
+        return conditions, params
+    
+    def _students_query(self, sort_column, descending, after=None, **filters):
+        """استعلام قائمة الطلاب المرتبة والمصفاة ومعاملاته"""
+        sort_expr = STUDENT_SORT_COLUMNS[sort_column]
+        direction = 'DESC' if descending else 'ASC'
+        conditions, params = self._student_filters(**filters)
+        
+        if after is not None:
+            operator = '<' if descending else '>'
+            conditions.append(f"({sort_expr}, s.id) {operator} (?, ?)")
+            params.extend(after)
+        
+        query = f'''
+            SELECT s.*, c.class_name, {sort_expr} AS sort_key
+            FROM students s
+            LEFT JOIN classes c ON s.class_id = c.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {sort_expr} {direction}, s.id {direction}
+        '''
+        return query, params
+    
+    def get_students_page(self, sort_column='full_name', descending=False,
+                          after=None, limit=100, **filters):
+        """
+        صفحة من الطلاب النشطين بترقيم المفاتيح (keyset pagination)
+        after: (sort_key، id) لآخر صف في الصفحة السابقة، أو None للصفحة الأولى
+        """
+        query, params = self._students_query(sort_column, descending, after, **filters)
+        self.cursor.execute(query + " LIMIT ?", params + [limit])
+        return self.cursor.fetchall()
+    
+    def iter_students(self, sort_column='full_name', descending=False, **filters):
+        """
+        جميع الطلاب المطابقين بالترتيب المطلوب كمؤشر مستقل
+        (تقرأ الصفوف عند التكرار دون تحميلها كاملة، للتصدير)
+        """
+        query, params = self._students_query(sort_column, descending, **filters)
+        return self.connection.cursor().execute(query, params)
+    
+    def count_students(self, **filters):
+        """عدد الطلاب النشطين المطابقين للتصفية"""
+        conditions, params = self._student_filters(**filters)
+        self.cursor.execute(f'''
+            SELECT COUNT(*) FROM students s WHERE {' AND '.join(conditions)}
+        ''', params)
+        return self.cursor.fetchone()[0]
+    
+    def search(self, table, text, limit=50):
+        """
+        بحث نصي في الطلاب أو المعلمين أو المواد
+        يرجع معرفات السجلات المطابقة مرتبة حسب الصلة
+        """
+        query = match_query(text)
+        if not query:
+            return []
+        fts = f"{table}_fts"
+        self.cursor.execute(f'''
+            SELECT rowid FROM {fts}
+            WHERE {fts} MATCH ?
+            ORDER BY bm25({fts}, {bm25_weights(table)})
+            LIMIT ?
+        ''', (query, limit))
+        return [row[0] for row in self.cursor.fetchall()]
+    
     def update_student(self, student_id, student_data):
         """تحديث بيانات طالب"""
         query = '''
@@ -281,6 +236,19 @@ class DatabaseManager:
         ''')
         return self.cursor.fetchall()
     
+    def get_teachers_with_subjects(self):
+        """الحصول على جميع المعلمين مع أسماء المواد المسندة إليهم في استعلام واحد"""
+        self.cursor.execute('''
+            SELECT t.*, u.username,
+                   GROUP_CONCAT(s.subject_name, ', ') AS subjects
+            FROM teachers t
+            JOIN users u ON t.user_id = u.id
+            LEFT JOIN teacher_subjects ts ON ts.teacher_id = t.id
+            LEFT JOIN subjects s ON ts.subject_id = s.id
+            GROUP BY t.id
+        ''')
+        return [dict(row) for row in self.cursor.fetchall()]
+    
     def add_class(self, class_data):
         """إضافة صف جديد"""
         self.cursor.execute('''
@@ -325,6 +293,29 @@ class DatabaseManager:
         self.cursor.execute("SELECT * FROM subjects")
         return self.cursor.fetchall()
     
+    def get_subjects_overview(self):
+        """الحصول على المواد مع معلميها وعدد صفوفها من تجميعات مستقلة"""
+        self.cursor.execute('''
+            SELECT s.id, s.subject_name, s.subject_code, s.credit_hours,
+                   s.subject_type, st.teachers,
+                   COALESCE(sc.classes_count, 0) AS classes_count, s.status
+            FROM subjects s
+            LEFT JOIN (
+                SELECT ts.subject_id,
+                       GROUP_CONCAT(t.full_name, ', ') AS teachers
+                FROM teacher_subjects ts
+                JOIN teachers t ON ts.teacher_id = t.id
+                GROUP BY ts.subject_id
+            ) st ON st.subject_id = s.id
+            LEFT JOIN (
+                SELECT subject_id, COUNT(DISTINCT class_id) AS classes_count
+                FROM timetable
+                GROUP BY subject_id
+            ) sc ON sc.subject_id = s.id
+            ORDER BY s.subject_name
+        ''')
+        return self.cursor.fetchall()
+    
     def assign_teacher_to_subject(self, teacher_id, subject_id):
         """ربط معلم بمادة"""
         self.cursor.execute('''
@@ -361,11 +352,124 @@ class DatabaseManager:
         ''', (student_id,))
         return self.cursor.fetchall()
     
+    def get_exam_grade_sheet(self, class_id, exam_id):
+        """الحصول على طلاب الصف مع درجاتهم في امتحان معين في استعلام واحد"""
+        self.cursor.execute('''
+            SELECT s.id, s.full_name, s.student_id, g.score, g.notes
+            FROM students s
+            LEFT JOIN grades g
+                ON g.student_id = s.id AND g.exam_id = ?
+            WHERE s.class_id = ?
+            ORDER BY s.full_name
+        ''', (exam_id, class_id))
+        return self.cursor.fetchall()
+    
+    def save_exam_grades(self, exam_id, grades):
+        """حفظ درجات امتحان كاملة دفعة واحدة وإرجاع عدد السجلات المضافة والمحدثة"""
+        with self.connection:
+            if not self.connection.in_transaction:
+                # IMMEDIATE: حجز قفل الكتابة قبل القراءة، فمعاملة القراءة المؤجلة
+                # تفشل فوراً (SQLITE_BUSY) عند ترقيتها إذا كتب اتصال آخر بينهما
+                self.cursor.execute("BEGIN IMMEDIATE")
+            
+            exam = self.cursor.execute(
+                "SELECT subject_id, max_score FROM exams WHERE id = ?",
+                (exam_id,)
+            ).fetchone()
+            if exam is None:
+                raise ValueError("الامتحان غير موجود")
+            
+            # العددان دقيقان: قفل الكتابة يمنع أي اتصال آخر من تعديل الدرجات بينهما
+            count_query = "SELECT COUNT(*) FROM grades WHERE exam_id = ?"
+            before = self.cursor.execute(count_query, (exam_id,)).fetchone()[0]
+            
+            self.cursor.executemany('''
+                INSERT INTO grades (student_id, subject_id, exam_id,
+                                    score, max_score, notes)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (exam_id, student_id)
+                DO UPDATE SET score = excluded.score,
+                              notes = excluded.notes
+            ''', [
+                (
+                    grade['student_id'],
+                    exam['subject_id'],
+                    exam_id,
+                    grade['score'],
+                    exam['max_score'],
+                    grade.get('notes', '')
+                )
+                for grade in grades
+            ])
+            
+            inserted = self.cursor.execute(count_query, (exam_id,)).fetchone()[0] - before
+        
+        return {'inserted': inserted, 'updated': len(grades) - inserted}
+    
+    def _grade_filters(self, class_id=None, subject_id=None, exam_type=None):
+        """شروط تصفية درجات الامتحانات ومعاملاتها (الشروط الفارغة تعني الكل)"""
+        conditions = ["1 = 1"]
+        params = []
+        for column, value in (('e.class_id', class_id),
+                              ('e.subject_id', subject_id),
+                              ('e.exam_type', exam_type)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        return conditions, params
+    
+    def iter_grades_for_export(self, group_by=None, **filters):
+        """
+        درجات الامتحانات للتصدير كمؤشر مستقل (تقرأ الصفوف عند التكرار)
+        group_by: None أو 'subject' أو 'exam'، والصفوف مرتبة حسب المجموعة
+        في العمودين group_key و group_title لتقسيمها على أوراق
+        """
+        if group_by == 'subject':
+            group_key, group_title = 'sub.id', 'sub.subject_name'
+            group_order = 'sub.subject_name, sub.id, '
+        elif group_by == 'exam':
+            group_key = 'e.id'
+            group_title = "e.exam_name || ' - ' || IFNULL(c.class_name, '')"
+            group_order = 'e.exam_date, e.id, '
+        else:
+            group_key, group_title, group_order = '0', "''", ''
+        
+        conditions, params = self._grade_filters(**filters)
+        query = f'''
+            SELECT {group_key} AS group_key, {group_title} AS group_title,
+                   c.class_name, sub.subject_name, e.exam_name, e.exam_type,
+                   e.exam_date, s.full_name, s.student_id, g.score,
+                   e.max_score,
+                   ROUND(g.score * 100.0 / e.max_score, 2) AS percentage,
+                   g.notes
+            FROM grades g
+            JOIN exams e ON g.exam_id = e.id
+            JOIN students s ON g.student_id = s.id
+            LEFT JOIN subjects sub ON e.subject_id = sub.id
+            LEFT JOIN classes c ON e.class_id = c.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {group_order}c.class_name, s.full_name, e.exam_date
+        '''
+        return self.connection.cursor().execute(query, params)
+    
+    def count_grades_for_export(self, **filters):
+        """عدد درجات الامتحانات المطابقة للتصفية"""
+        conditions, params = self._grade_filters(**filters)
+        self.cursor.execute(f'''
+            SELECT COUNT(*)
+            FROM grades g
+            JOIN exams e ON g.exam_id = e.id
+            WHERE {' AND '.join(conditions)}
+        ''', params)
+        return self.cursor.fetchone()[0]
+    
     def mark_attendance(self, attendance_data):
         """تسجيل الحضور"""
         self.cursor.execute('''
-            INSERT OR REPLACE INTO attendance (student_id, date, status, notes)
+            INSERT INTO attendance (student_id, date, status, notes)
             VALUES (?, ?, ?, ?)
+            ON CONFLICT (student_id, date, IFNULL(subject_id, 0))
+            DO UPDATE SET status = excluded.status, notes = excluded.notes
         ''', (
             attendance_data['student_id'],
             attendance_data['date'],
@@ -394,6 +498,91 @@ class DatabaseManager:
             self.cursor.execute(query, (date,))
         return self.cursor.fetchall()
     
+    def save_attendance_sheet(self, records):
+        """حفظ كشف الحضور كاملاً دفعة واحدة (إضافة أو تحديث)"""
+        # سجل لكل مادة يتطلب إزالة قيد UNIQUE(student_id, date) القديم، وهو ما
+        # يفعله الترحيل 3 بإعادة بناء الجدول قبل أن يتاح الاتصال للشاشات
+        with self.connection:
+            self.cursor.executemany('''
+                INSERT INTO attendance (student_id, date, status,
+                                        check_in_time, notes, subject_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (student_id, date, IFNULL(subject_id, 0))
+                DO UPDATE SET status = excluded.status,
+                              check_in_time = excluded.check_in_time,
+                              notes = excluded.notes
+            ''', [
+                (
+                    record['student_id'],
+                    record['date'],
+                    record['status'],
+                    record.get('check_in_time'),
+                    record.get('notes', ''),
+                    record.get('subject_id')
+                )
+                for record in records
+            ])
+    
+    def get_attendance_sheet(self, class_id, date, subject_id=None):
+        """الحصول على كشف حضور الصف كاملاً (الطلاب مع سجلاتهم) في استعلام واحد"""
+        self.cursor.execute('''
+            SELECT s.id, s.full_name, s.student_id,
+                   a.status, a.check_in_time, a.notes
+            FROM students s
+            LEFT JOIN attendance a
+                ON a.student_id = s.id
+               AND a.date = ?
+               AND a.subject_id IS ?
+            WHERE s.class_id = ?
+            ORDER BY s.full_name
+        ''', (date, subject_id, class_id))
+        return self.cursor.fetchall()
+    
+    def get_class_attendance_statistics(self, class_id, from_date, to_date):
+        """إحصائيات حضور طلاب الصف وإجماليات الصف لفترة محددة في استعلام واحد"""
+        self.cursor.execute('''
+            WITH class_attendance AS (
+                SELECT a.student_id, a.date, a.status
+                FROM attendance a
+                JOIN students s ON a.student_id = s.id
+                WHERE s.class_id = ? AND a.date BETWEEN ? AND ?
+            )
+            SELECT 0 AS is_total, s.id, s.full_name,
+                   COUNT(ca.status) AS total,
+                   COUNT(CASE WHEN ca.status = 'present' THEN 1 END) AS present,
+                   COUNT(CASE WHEN ca.status = 'absent' THEN 1 END) AS absent,
+                   COUNT(CASE WHEN ca.status = 'late' THEN 1 END) AS late,
+                   COUNT(CASE WHEN ca.status = 'excused' THEN 1 END) AS excused,
+                   NULL AS school_days
+            FROM students s
+            LEFT JOIN class_attendance ca ON ca.student_id = s.id
+            WHERE s.class_id = ?
+            GROUP BY s.id
+            UNION ALL
+            SELECT 1, NULL, NULL,
+                   COUNT(*),
+                   COUNT(CASE WHEN status = 'present' THEN 1 END),
+                   COUNT(CASE WHEN status = 'absent' THEN 1 END),
+                   COUNT(CASE WHEN status = 'late' THEN 1 END),
+                   COUNT(CASE WHEN status = 'excused' THEN 1 END),
+                   COUNT(DISTINCT date)
+            FROM class_attendance
+            ORDER BY is_total, full_name
+        ''', (class_id, from_date, to_date, class_id))
+        rows = self.cursor.fetchall()
+        
+        # الصف الأخير يحمل إجماليات الصف
+        totals = rows[-1]
+        return {
+            'students': rows[:-1],
+            'school_days': totals['school_days'],
+            'total': totals['total'],
+            'present': totals['present'],
+            'absent': totals['absent'],
+            'late': totals['late'],
+            'excused': totals['excused']
+        }
+    
     def add_timetable_entry(self, timetable_data):
         """إضافة حصة للجدول الدراسي"""
         self.cursor.execute('''
@@ -466,43 +655,53 @@ class DatabaseManager:
         self.connection.commit()
     
     def get_dashboard_stats(self):
-        """إحصائيات لوحة التحكم"""
-        stats = {}
-        
-        # عدد الطلاب
-        self.cursor.execute("SELECT COUNT(*) FROM students WHERE status = 'active'")
-        stats['total_students'] = self.cursor.fetchone()[0]
-        
-        # عدد المعلمين
-        self.cursor.execute("SELECT COUNT(*) FROM teachers")
-        stats['total_teachers'] = self.cursor.fetchone()[0]
-        
-        # عدد الصفوف
-        self.cursor.execute("SELECT COUNT(*) FROM classes")
-        stats['total_classes'] = self.cursor.fetchone()[0]
-        
-        # عدد المواد
-        self.cursor.execute("SELECT COUNT(*) FROM subjects")
-        stats['total_subjects'] = self.cursor.fetchone()[0]
-        
-        # نسبة الحضور اليوم
-        today = datetime.now().strftime('%Y-%m-%d')
+        """إحصائيات لوحة التحكم (من الذاكرة المؤقتة، ويعاد حساب المتغير منها فقط)"""
+        return get_dashboard_stats(self.pool.db_path).get(self.connection)
+    
+    def get_attendance_trend(self, days=7, class_id=None):
+        """نسبة الحضور اليومية لآخر عدد من الأيام من جدول التجميع اليومي"""
+        query = '''
+            SELECT date, 100.0 * SUM(present) / SUM(total) AS rate
+            FROM attendance_daily
+            WHERE date > date('now', 'localtime', ?)
+        '''
+        params = [f"-{int(days)} days"]
+        if class_id is not None:
+            query += " AND class_id = ?"
+            params.append(class_id)
+        query += " GROUP BY date HAVING SUM(total) > 0 ORDER BY date"
+        self.cursor.execute(query, params)
+        return self.cursor.fetchall()
+    
+    def get_grade_bands(self, from_month, to_month):
+        """عدد الدرجات في كل فئة تقدير للأشهر من from_month إلى ما قبل to_month"""
         self.cursor.execute('''
-            SELECT 
-                COUNT(CASE WHEN status = 'present' THEN 1 END) as present,
-                COUNT(*) as total
-            FROM attendance
-            WHERE date = ?
-        ''', (today,))
-        result = self.cursor.fetchone()
-        if result and result['total'] > 0:
-            stats['attendance_rate'] = (result['present'] / result['total']) * 100
-        else:
-            stats['attendance_rate'] = 0
-        
-        return stats
+            SELECT band, SUM(count) AS count
+            FROM grade_bands
+            WHERE month >= ? AND month < ?
+            GROUP BY band
+        ''', (from_month, to_month))
+        return {row['band']: row['count'] for row in self.cursor.fetchall()}
+    
+    def get_recent_activity(self, limit=5):
+        """آخر الأنشطة من سجل الأنشطة مع اسم الامتحان أو الصف المرتبط"""
+        self.cursor.execute('''
+            SELECT l.action, l.count, l.updated_at,
+                   CASE l.action
+                       WHEN 'grades_entered' THEN e.exam_name
+                       WHEN 'attendance_taken' THEN c.class_name
+                   END AS name
+            FROM activity_log l
+            LEFT JOIN exams e
+                ON l.action = 'grades_entered' AND e.id = l.ref_id
+            LEFT JOIN classes c
+                ON l.action = 'attendance_taken' AND c.id = l.ref_id
+            ORDER BY l.updated_at DESC
+            LIMIT ?
+        ''', (limit,))
+        return self.cursor.fetchall()
     
     def close(self):
-        """إغلاق الاتصال بقاعدة البيانات"""
-        self.connection.close()
+        """إغلاق المؤشر (الاتصال مشترك ويغلقه المجمع عند انتهاء العملية)"""
+        self.cursor.close()
             
@@ -0,0 +1,488 @@
+"""
+محرك ترحيل مخطط قاعدة البيانات
+ترحيلات مرقمة تطبق مرة واحدة لكل قاعدة بيانات داخل معاملة، ويحفظ رقم
+الإصدار في PRAGMA user_version (قراءة واحدة عند التشغيل) وفي جدول
+schema_version (سجل الترحيلات المطبقة)
+
+إضافة ترحيل جديد: أضف دالة تستقبل الاتصال في نهاية MIGRATIONS برقم أكبر،
+ولا تعدل ترحيلاً سبق تطبيقه
+"""
+
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+from database.dashboard_stats import create_version_triggers
+from database.rollups import create_activity_triggers, create_rollups
+from database.search import SEARCH_INDEXES, create_search_index
+
+# عدد الصفوف المنسوخة في كل معاملة أثناء إعادة بناء الجداول الكبيرة
+BATCH_SIZE = 5000
+
+# الفهارس الثانوية لعمليات البحث المتكررة: (اسم الفهرس، الجدول، الأعمدة)
+# ملاحظة: grades.exam_id مغطى بالفهرس الفريد idx_grades_exam_student
+INDEXES = [
+    ('idx_students_class', 'students', 'class_id, full_name'),
+    ('idx_teachers_user', 'teachers', 'user_id'),
+    ('idx_grades_student', 'grades', 'student_id'),
+    ('idx_grades_subject', 'grades', 'subject_id'),
+    ('idx_exams_class_subject', 'exams', 'class_id, subject_id'),
+    ('idx_attendance_date', 'attendance', 'date'),
+    ('idx_timetable_class', 'timetable', 'class_id'),
+    ('idx_timetable_teacher', 'timetable', 'teacher_id'),
+    ('idx_timetable_subject', 'timetable', 'subject_id'),
+    ('idx_notifications_recipient', 'notifications', 'recipient_id, created_at'),
+    ('idx_teacher_subjects_subject', 'teacher_subjects', 'subject_id')
+]
+
+
+@contextmanager
+def transaction(connection):
+    """تنفيذ كتلة داخل معاملة كتابة، والتراجع عنها عند حدوث خطأ"""
+    # IMMEDIATE: حجز قفل الكتابة من البداية لمنع ترحيلين متزامنين
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.rollback()
+        raise
+    connection.commit()
+
+
+def get_version(connection):
+    """رقم إصدار مخطط قاعدة البيانات الحالي"""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def add_columns(connection, table, columns):
+    """إضافة الأعمدة غير الموجودة إلى جدول قائم"""
+    existing = {
+        row[1] for row in
+        connection.execute(f"PRAGMA table_info({table})").fetchall()
+    }
+    for name, definition in columns.items():
+        if name not in existing:
+            connection.execute(
+                f"ALTER TABLE {table} ADD COLUMN {name} {definition}"
+            )
+
+
+class TableRebuild:
+    """
+    إعادة بناء جدول على دفعات (ترحيل متصل)
+    تنسخ الصفوف إلى الجدول الجديد بمعاملة قصيرة لكل دفعة حتى تبقى قاعدة
+    البيانات متاحة للاتصالات الأخرى، وتنقل المشغلات (triggers) أي تعديل
+    على الجدول القديم أثناء النسخ. يمكن استئناف النسخ إذا توقف في منتصفه
+    """
+
+    def __init__(self, table, create_sql, columns, finish_sql=()):
+        self.table = table
+        self.new_table = f"{table}_new"
+        self.create_sql = create_sql
+        self.columns = columns
+        self.finish_sql = finish_sql
+
+    def prepare(self, connection):
+        """إنشاء الجدول الجديد ومشغلات مزامنة التعديلات"""
+        columns = ', '.join(self.columns)
+        values = ', '.join(f"NEW.{name}" for name in self.columns)
+        connection.execute(self.create_sql.format(table=self.new_table))
+        for event in ('INSERT', 'UPDATE'):
+            connection.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {self.new_table}_{event.lower()}
+                AFTER {event} ON {self.table}
+                BEGIN
+                    INSERT OR REPLACE INTO {self.new_table} ({columns})
+                    VALUES ({values});
+                END
+            ''')
+        connection.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {self.new_table}_delete
+            AFTER DELETE ON {self.table}
+            BEGIN
+                DELETE FROM {self.new_table} WHERE id = OLD.id;
+            END
+        ''')
+
+    def copy_batch(self, connection, last_id, batch_size):
+        """نسخ دفعة من الصفوف بعد last_id، وإرجاع آخر معرف منسوخ"""
+        batch_end = connection.execute(f'''
+            SELECT MAX(id) FROM (
+                SELECT id FROM {self.table} WHERE id > ? ORDER BY id LIMIT ?
+            )
+        ''', (last_id, batch_size)).fetchone()[0]
+        if batch_end is None:
+            return None
+        columns = ', '.join(self.columns)
+        # الصفوف الموجودة مسبقاً نسختها المشغلات وهي الأحدث
+        connection.execute(f'''
+            INSERT OR IGNORE INTO {self.new_table} ({columns})
+            SELECT {columns} FROM {self.table} WHERE id > ? AND id <= ?
+        ''', (last_id, batch_end))
+        return batch_end
+
+    def finish(self, connection):
+        """استبدال الجدول القديم بالجديد (تحذف مشغلاته معه)"""
+        connection.execute(f"DROP TABLE {self.table}")
+        connection.execute(f"ALTER TABLE {self.new_table} RENAME TO {self.table}")
+        for sql in self.finish_sql:
+            connection.execute(sql)
+
+
+def _create_base_tables(connection):
+    """المخطط الأساسي للنظام"""
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at DATETIME
+        )
+    ''')
+
+    # جدول المستخدمين
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            full_name TEXT,
+            email TEXT,
+            phone TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # جدول الطلاب
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS students (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id TEXT UNIQUE NOT NULL,
+            full_name TEXT NOT NULL,
+            date_of_birth DATE,
+            gender TEXT,
+            address TEXT,
+            phone TEXT,
+            parent_phone TEXT,
+            class_id INTEGER,
+            enrollment_date DATE DEFAULT CURRENT_DATE,
+            status TEXT DEFAULT 'active',
+            FOREIGN KEY (class_id) REFERENCES classes (id)
+        )
+    ''')
+
+    # جدول المعلمين
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS teachers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            teacher_id TEXT UNIQUE NOT NULL,
+            full_name TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            specialization TEXT,
+            hire_date DATE DEFAULT CURRENT_DATE,
+            user_id INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+    # جدول الصفوف
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS classes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            class_name TEXT NOT NULL,
+            grade_level INTEGER,
+            section TEXT,
+            capacity INTEGER,
+            academic_year TEXT
+        )
+    ''')
+
+    # جدول المواد
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS subjects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject_name TEXT NOT NULL,
+            subject_code TEXT UNIQUE,
+            credits INTEGER,
+            description TEXT
+        )
+    ''')
+
+    # جدول الدرجات
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS grades (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            subject_id INTEGER NOT NULL,
+            exam_type TEXT,
+            score REAL,
+            max_score REAL,
+            date DATE DEFAULT CURRENT_DATE,
+            teacher_id INTEGER,
+            FOREIGN KEY (student_id) REFERENCES students (id),
+            FOREIGN KEY (subject_id) REFERENCES subjects (id),
+            FOREIGN KEY (teacher_id) REFERENCES teachers (id)
+        )
+    ''')
+
+    # جدول الحضور
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS attendance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            status TEXT NOT NULL,
+            notes TEXT,
+            FOREIGN KEY (student_id) REFERENCES students (id),
+            UNIQUE(student_id, date)
+        )
+    ''')
+
+    # جدول الجدول الدراسي
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS timetable (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            class_id INTEGER NOT NULL,
+            subject_id INTEGER NOT NULL,
+            teacher_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            start_time TIME NOT NULL,
+            end_time TIME NOT NULL,
+            room TEXT,
+            FOREIGN KEY (class_id) REFERENCES classes (id),
+            FOREIGN KEY (subject_id) REFERENCES subjects (id),
+            FOREIGN KEY (teacher_id) REFERENCES teachers (id)
+        )
+    ''')
+
+    # جدول الإشعارات
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender_id INTEGER,
+            recipient_id INTEGER,
+            title TEXT NOT NULL,
+            message TEXT NOT NULL,
+            type TEXT,
+            is_read BOOLEAN DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (sender_id) REFERENCES users (id),
+            FOREIGN KEY (recipient_id) REFERENCES users (id)
+        )
+    ''')
+
+    # جدول ربط المعلمين بالمواد
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS teacher_subjects (
+            teacher_id INTEGER NOT NULL,
+            subject_id INTEGER NOT NULL,
+            PRIMARY KEY (teacher_id, subject_id),
+            FOREIGN KEY (teacher_id) REFERENCES teachers (id),
+            FOREIGN KEY (subject_id) REFERENCES subjects (id)
+        )
+    ''')
+
+    # حساب مدير افتراضي
+    password_hash = hashlib.sha256("admin123".encode()).hexdigest()
+    connection.execute('''
+        INSERT OR IGNORE INTO users (username, password, role, full_name)
+        VALUES (?, ?, ?, ?)
+    ''', ('admin', password_hash, 'admin', 'مدير النظام'))
+
+
+def _add_exams_and_columns(connection):
+    """جدول الامتحانات والأعمدة التي تستخدمها الواجهات"""
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS exams (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            exam_name TEXT NOT NULL,
+            exam_type TEXT,
+            exam_date DATE,
+            max_score REAL,
+            description TEXT,
+            class_id INTEGER,
+            subject_id INTEGER,
+            FOREIGN KEY (class_id) REFERENCES classes (id),
+            FOREIGN KEY (subject_id) REFERENCES subjects (id)
+        )
+    ''')
+
+    add_columns(connection, 'grades', {
+        'exam_id': 'INTEGER REFERENCES exams (id)',
+        'notes': 'TEXT'
+    })
+    add_columns(connection, 'attendance', {
+        'check_in_time': 'TEXT',
+        'subject_id': 'INTEGER REFERENCES subjects (id)'
+    })
+    add_columns(connection, 'teachers', {
+        'status': "TEXT DEFAULT 'active'"
+    })
+    add_columns(connection, 'classes', {
+        'status': "TEXT DEFAULT 'active'",
+        'class_teacher_id': 'INTEGER REFERENCES teachers (id)',
+        'room_number': 'TEXT',
+        'floor': 'TEXT',
+        'description': 'TEXT',
+        'created_at': 'DATETIME'
+    })
+    add_columns(connection, 'subjects', {
+        'credit_hours': 'INTEGER',
+        'subject_type': "TEXT DEFAULT 'core'",
+        'status': "TEXT DEFAULT 'active'",
+        'prerequisites': 'TEXT',
+        'textbook': 'TEXT',
+        'created_at': 'DATETIME'
+    })
+
+    # نقل الساعات المعتمدة من العمود القديم
+    connection.execute(
+        "UPDATE subjects SET credit_hours = credits WHERE credit_hours IS NULL"
+    )
+
+    # درجة واحدة لكل طالب في كل امتحان
+    connection.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_grades_exam_student
+        ON grades (exam_id, student_id)
+    ''')
+
+
+# إزالة قيد UNIQUE(student_id, date) للسماح بحضور كل مادة على حدة
+_rebuild_attendance = TableRebuild(
+    'attendance',
+    '''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            date DATE NOT NULL,
+            status TEXT NOT NULL,
+            check_in_time TEXT,
+            notes TEXT,
+            subject_id INTEGER,
+            FOREIGN KEY (student_id) REFERENCES students (id),
+            FOREIGN KEY (subject_id) REFERENCES subjects (id)
+        )
+    ''',
+    ['id', 'student_id', 'date', 'status', 'check_in_time', 'notes', 'subject_id'],
+    finish_sql=[
+        # سجل حضور واحد لكل طالب في اليوم لكل مادة (أو لليوم كاملاً)
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_student_date_subject
+        ON attendance (student_id, date, IFNULL(subject_id, 0))
+        '''
+    ]
+)
+
+
+def _create_indexes(connection):
+    """الفهارس الثانوية"""
+    for name, table, columns in INDEXES:
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+        )
+
+
+def _create_student_list_index(connection):
+    """فهرس قائمة الطلاب النشطين مرتبة بالاسم (ترقيم المفاتيح)"""
+    connection.execute('''
+        CREATE INDEX IF NOT EXISTS idx_students_status_name
+        ON students (status, full_name)
+    ''')
+
+
+def _create_search_indexes(connection):
+    """فهارس البحث النصي للطلاب والمعلمين والمواد"""
+    for table in SEARCH_INDEXES:
+        create_search_index(connection, table)
+
+
+def _create_stats_versions(connection):
+    """إصدارات الجداول لإبطال إحصائيات لوحة التحكم المخزنة"""
+    create_version_triggers(connection)
+
+
+def _create_rollups(connection):
+    """جداول التجميع المسبق لمخططات لوحة التحكم وسجل الأنشطة"""
+    create_rollups(connection)
+
+
+def _create_settings(connection):
+    """جدول إعدادات التطبيق (مفتاح وقيمة)"""
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            setting_key TEXT PRIMARY KEY,
+            setting_value TEXT
+        )
+    ''')
+
+
+def _skip_unchanged_grade_activity(connection):
+    """عدم تسجيل نشاط عند إعادة حفظ درجة دون تغيير قيمتها"""
+    create_activity_triggers(connection, replace=True)
+
+
+# الترحيلات بالترتيب: (رقم الإصدار، الوصف، دالة الترحيل أو TableRebuild)
+MIGRATIONS = [
+    (1, 'المخطط الأساسي', _create_base_tables),
+    (2, 'جدول الامتحانات والأعمدة الناقصة', _add_exams_and_columns),
+    (3, 'إعادة بناء جدول الحضور', _rebuild_attendance),
+    (4, 'الفهارس الثانوية', _create_indexes),
+    (5, 'فهرس قائمة الطلاب', _create_student_list_index),
+    (6, 'فهارس البحث النصي', _create_search_indexes),
+    (7, 'إصدارات جداول الإحصائيات', _create_stats_versions),
+    (8, 'جداول التجميع للوحة التحكم', _create_rollups),
+    (9, 'جدول الإعدادات', _create_settings),
+    (10, 'تجاهل إعادة حفظ الدرجات في سجل الأنشطة', _skip_unchanged_grade_activity)
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _record(connection, version, description):
+    """تسجيل الترحيل المطبق وتحديث رقم الإصدار ضمن المعاملة نفسها"""
+    connection.execute('''
+        INSERT OR REPLACE INTO schema_version (version, description, applied_at)
+        VALUES (?, ?, ?)
+    ''', (version, description, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    connection.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def _copy_table(connection, version, rebuild, batch_size):
+    """نسخ صفوف الجدول على دفعات، كل دفعة في معاملة مستقلة"""
+    with transaction(connection):
+        if get_version(connection) >= version:
+            return
+        rebuild.prepare(connection)
+
+    last_id = 0
+    while last_id is not None:
+        with transaction(connection):
+            # توقف إذا أكملت عملية أخرى هذا الترحيل
+            if get_version(connection) >= version:
+                return
+            last_id = rebuild.copy_batch(connection, last_id, batch_size)
+
+
+def migrate(connection, batch_size=BATCH_SIZE):
+    """تطبيق الترحيلات غير المطبقة وإرجاع رقم الإصدار الحالي"""
+    version = get_version(connection)
+    if version >= LATEST_VERSION:
+        return version
+
+    for number, description, migration in MIGRATIONS:
+        if version >= number:
+            continue
+
+        if isinstance(migration, TableRebuild):
+            _copy_table(connection, number, migration, batch_size)
+            migration = migration.finish
+
+        with transaction(connection):
+            # إعادة القراءة بعد حجز القفل في حال سبقتنا عملية أخرى
+            version = get_version(connection)
+            if version < number:
+                migration(connection)
+                _record(connection, number, description)
+                version = number
+
+    return version
@@ -0,0 +1,117 @@
+"""
+تقرير خطط تنفيذ الاستعلامات (EXPLAIN QUERY PLAN)
+يسجل الاستعلامات المنفذة على الاتصال ويبين الفهارس التي يستخدمها كل منها
+
+الاستخدام:
+    python -m database.query_plan
+"""
+
+import re
+from datetime import datetime
+
+_INDEX_RE = re.compile(r'USING (?:COVERING )?INDEX (\w+)|USING (INTEGER PRIMARY KEY)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_QUERY_PREFIXES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def _normalize(sql):
+    """توحيد نص الاستعلام بإزالة القيم الحرفية والمسافات الزائدة"""
+    return ' '.join(_LITERAL_RE.sub('?', sql).split())
+
+
+def analyze(connection, sql, params=()):
+    """تحليل خطة تنفيذ استعلام واستخراج الفهارس والمسح الكامل للجداول"""
+    plan = [
+        row[3] for row in
+        connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    ]
+    indexes = sorted({
+        match.group(1) or match.group(2)
+        for detail in plan
+        for match in _INDEX_RE.finditer(detail)
+    })
+    full_scans = [
+        detail for detail in plan
+        if detail.startswith('SCAN ') and 'USING' not in detail
+    ]
+    return {
+        'sql': _normalize(sql),
+        'plan': plan,
+        'indexes': indexes,
+        'full_scans': full_scans
+    }
+
+
+class QueryPlanRecorder:
+    """تسجيل الاستعلامات المنفذة على اتصال لعرض خطط تنفيذها لاحقاً"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.statements = {}
+
+    def __enter__(self):
+        self.connection.set_trace_callback(self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.connection.set_trace_callback(None)
+
+    def _record(self, statement):
+        sql = statement.strip()
+        if sql.upper().startswith(_QUERY_PREFIXES):
+            # الاحتفاظ بأول نسخة فعلية من كل استعلام
+            self.statements.setdefault(_normalize(sql), sql)
+
+    def report(self):
+        """خطط تنفيذ جميع الاستعلامات المسجلة"""
+        return [analyze(self.connection, sql) for sql in self.statements.values()]
+
+
+def format_report(report):
+    """تنسيق التقرير كنص للعرض"""
+    lines = []
+    for entry in report:
+        lines.append(entry['sql'])
+        lines.append(f"  indexes: {', '.join(entry['indexes']) or '-'}")
+        for scan in entry['full_scans']:
+            lines.append(f"  full scan: {scan}")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def main():
+    """تشغيل استعلامات القراءة الرئيسية وطباعة الفهارس المستخدمة"""
+    from database.db_manager import DatabaseManager
+
+    db = DatabaseManager()
+    today = datetime.now().strftime('%Y-%m-%d')
+
+    def first_id(table):
+        row = db.cursor.execute(f"SELECT id FROM {table} LIMIT 1").fetchone()
+        return row[0] if row else 1
+
+    class_id = first_id('classes')
+    exam_id = first_id('exams')
+
+    with QueryPlanRecorder(db.connection) as recorder:
+        db.get_all_students()
+        db.get_teachers_with_subjects()
+        db.get_subjects_overview()
+        db.get_all_classes()
+        db.get_student_grades(first_id('students'))
+        db.get_exam_grade_sheet(class_id, exam_id)
+        db.get_attendance_by_date(today, class_id)
+        db.get_attendance_sheet(class_id, today)
+        db.get_class_attendance_statistics(class_id, today, today)
+        db.get_timetable_by_class(class_id)
+        db.get_user_notifications(first_id('users'))
+        db.get_dashboard_stats()
+        db.get_attendance_trend()
+        db.get_grade_bands(today[:7], '9999-12')
+        db.get_recent_activity()
+
+    print(format_report(recorder.report()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+جداول التجميع المسبق للوحة التحكم
+تحدثها المشغلات مع كل كتابة فيبقى رسم المخططات بتكلفة عدد الأيام أو الأشهر
+لا عدد السجلات:
+    attendance_daily: عدد الحاضرين والإجمالي لكل صف في كل يوم
+    grade_bands: عدد الدرجات في كل فئة تقدير لكل شهر
+    activity_log: عدد العمليات لكل نوع ومرجع في كل يوم (آخر الأنشطة)
+"""
+
+from datetime import date
+import config
+
+# فئات التقدير بالترتيب: (المفتاح، الحد الأدنى للنسبة المئوية)
+GRADE_BANDS = [
+    ('excellent', 90),
+    ('very_good', 80),
+    ('good', 70),
+    ('pass', 60),
+    ('fail', 0)
+]
+
+# أنواع النشاط المسجلة: (النوع، الجدول، الحدث، المرجع، شرط التسجيل أو None)
+# تجمع العمليات المتشابهة في اليوم نفسه في سجل واحد يزيد عداده
+ACTIVITIES = [
+    ('students_added', 'students', 'INSERT', '0', None),
+    ('teachers_added', 'teachers', 'INSERT', '0', None),
+    ('classes_added', 'classes', 'INSERT', '0', None),
+    ('subjects_added', 'subjects', 'INSERT', '0', None),
+    ('exams_added', 'exams', 'INSERT', '0', None),
+    ('grades_entered', 'grades', 'INSERT', 'IFNULL(NEW.exam_id, 0)', None),
+    # إعادة حفظ كشف الدرجات دون تغيير لا تعد إدخالاً
+    ('grades_entered', 'grades', 'UPDATE OF score', 'IFNULL(NEW.exam_id, 0)',
+     'OLD.score IS NOT NEW.score'),
+    ('attendance_taken', 'attendance', 'INSERT',
+     'IFNULL((SELECT class_id FROM students WHERE id = NEW.student_id), 0)', None)
+]
+
+
+def _student_class(row):
+    """صف الطالب الحالي (الحضور لا يخزن الصف)"""
+    return f"IFNULL((SELECT class_id FROM students WHERE id = {row}.student_id), 0)"
+
+
+def _band_sql(row):
+    """فئة التقدير لدرجة"""
+    percentage = f"{row}.score * 100.0 / {row}.max_score"
+    cases = ' '.join(
+        f"WHEN {percentage} >= {minimum} THEN '{band}'"
+        for band, minimum in GRADE_BANDS[:-1]
+    )
+    return f"CASE {cases} ELSE '{GRADE_BANDS[-1][0]}' END"
+
+
+def _add_attendance(row, sign):
+    """إضافة سجل الحضور إلى التجميع اليومي (أو طرحه بإشارة سالبة)"""
+    return f'''
+        INSERT INTO attendance_daily (date, class_id, present, total)
+        VALUES ({row}.date, {_student_class(row)},
+                {sign}({row}.status = 'present'), {sign}1)
+        ON CONFLICT (date, class_id)
+        DO UPDATE SET present = present + excluded.present,
+                      total = total + excluded.total;
+    '''
+
+
+def _add_grade(row, sign):
+    """إضافة الدرجة إلى تجميع فئات التقدير الشهري (أو طرحها)"""
+    return f'''
+        INSERT INTO grade_bands (month, band, count)
+        SELECT strftime('%Y-%m', {row}.date), {_band_sql(row)}, {sign}1
+        WHERE {row}.score IS NOT NULL AND {row}.max_score > 0
+        ON CONFLICT (month, band)
+        DO UPDATE SET count = count + excluded.count;
+    '''
+
+
+def create_rollups(connection):
+    """إنشاء جداول التجميع ومشغلاتها وتعبئتها بالبيانات الحالية"""
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS attendance_daily (
+            date DATE NOT NULL,
+            class_id INTEGER NOT NULL,
+            present INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, class_id)
+        ) WITHOUT ROWID
+    ''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS grade_bands (
+            month TEXT NOT NULL,
+            band TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, band)
+        ) WITHOUT ROWID
+    ''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS activity_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day DATE NOT NULL,
+            action TEXT NOT NULL,
+            ref_id INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL,
+            UNIQUE (day, action, ref_id)
+        )
+    ''')
+    connection.execute('''
+        CREATE INDEX IF NOT EXISTS idx_activity_log_updated
+        ON activity_log (updated_at)
+    ''')
+
+    # ملاحظة: يحسب الحضور على صف الطالب وقت الكتابة، فنقل الطالب لصف آخر
+    # ثم تعديل حضوره القديم يغير توزيع الصفوف لا مجموع اليوم
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_attendance_insert
+        AFTER INSERT ON attendance
+        BEGIN
+            {_add_attendance('NEW', '')}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_attendance_update
+        AFTER UPDATE OF student_id, date, status ON attendance
+        BEGIN
+            {_add_attendance('OLD', '-')}
+            {_add_attendance('NEW', '')}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_attendance_delete
+        AFTER DELETE ON attendance
+        BEGIN
+            {_add_attendance('OLD', '-')}
+        END
+    ''')
+
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_grades_insert
+        AFTER INSERT ON grades
+        BEGIN
+            {_add_grade('NEW', '')}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_grades_update
+        AFTER UPDATE OF date, score, max_score ON grades
+        BEGIN
+            {_add_grade('OLD', '-')}
+            {_add_grade('NEW', '')}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS rollup_grades_delete
+        AFTER DELETE ON grades
+        BEGIN
+            {_add_grade('OLD', '-')}
+        END
+    ''')
+
+    create_activity_triggers(connection)
+
+    connection.execute("DELETE FROM attendance_daily")
+    connection.execute('''
+        INSERT INTO attendance_daily (date, class_id, present, total)
+        SELECT a.date, IFNULL(s.class_id, 0),
+               SUM(a.status = 'present'), COUNT(*)
+        FROM attendance a
+        LEFT JOIN students s ON a.student_id = s.id
+        GROUP BY a.date, IFNULL(s.class_id, 0)
+    ''')
+    connection.execute("DELETE FROM grade_bands")
+    connection.execute(f'''
+        INSERT INTO grade_bands (month, band, count)
+        SELECT strftime('%Y-%m', g.date) AS month, {_band_sql('g')} AS band,
+               COUNT(*)
+        FROM grades g
+        WHERE g.score IS NOT NULL AND g.max_score > 0
+        GROUP BY month, band
+    ''')
+
+
+def _activity_trigger_name(table, event):
+    return f"activity_{table}_{event.split()[0].lower()}"
+
+
+def create_activity_triggers(connection, replace=False):
+    """مشغلات سجل الأنشطة (replace: حذف الموجودة أولاً لتطبيق تعريف جديد)"""
+    for action, table, event, ref, condition in ACTIVITIES:
+        name = _activity_trigger_name(table, event)
+        if replace:
+            connection.execute(f"DROP TRIGGER IF EXISTS {name}")
+        when = f"WHEN {condition}" if condition else ''
+        connection.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table}
+            {when}
+            BEGIN
+                INSERT INTO activity_log (day, action, ref_id, count, updated_at)
+                VALUES (date('now', 'localtime'), '{action}', {ref}, 1,
+                        datetime('now', 'localtime'))
+                ON CONFLICT (day, action, ref_id)
+                DO UPDATE SET count = count + 1,
+                              updated_at = excluded.updated_at;
+            END
+        ''')
+
+
+def term_months(today=None):
+    """
+    أول شهر في الفصل الدراسي الحالي والشهر الذي يبدأ فيه الفصل التالي
+    بصيغة 'YYYY-MM' حسب config.TERM_START_MONTHS
+    """
+    today = today or date.today()
+    starts = sorted(config.TERM_START_MONTHS)
+    # بدايات الفصول في السنة الماضية والحالية والقادمة بالترتيب
+    candidates = [
+        (year, month)
+        for year in (today.year - 1, today.year, today.year + 1)
+        for month in starts
+    ]
+    current = max(c for c in candidates if c <= (today.year, today.month))
+    following = candidates[candidates.index(current) + 1]
+    return (f"{current[0]:04d}-{current[1]:02d}",
+            f"{following[0]:04d}-{following[1]:02d}")
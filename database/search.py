@@ -0,0 +1,120 @@
+"""
+البحث النصي الكامل (FTS5) في الطلاب والمعلمين والمواد
+يخزن الفهرس نصاً موحداً (توحيد الألف والياء والتاء المربوطة وحذف التشكيل)
+تحسبه المشغلات بدوال SQL فقط، فيبقى الفهرس متزامناً مع أي عملية كتابة
+"""
+
+import re
+
+# الأعمدة المفهرسة لكل جدول وأوزانها في ترتيب النتائج (bm25)
+SEARCH_INDEXES = {
+    'students': {
+        'full_name': 10.0,
+        'student_id': 5.0,
+        'phone': 2.0,
+        'parent_phone': 2.0,
+        'address': 1.0
+    },
+    'teachers': {
+        'full_name': 10.0,
+        'teacher_id': 5.0,
+        'phone': 2.0,
+        'email': 2.0,
+        'specialization': 1.0
+    },
+    'subjects': {
+        'subject_name': 10.0,
+        'subject_code': 5.0,
+        'description': 1.0
+    }
+}
+
+# التشكيل والتطويل (تحذف)
+_DIACRITICS = 'ًٌٍَُِّْٰـ'
+
+# توحيد أشكال الحروف والأرقام العربية
+_FOLDS = {
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)}
+}
+
+_CHAR_MAP = {**{char: '' for char in _DIACRITICS}, **_FOLDS}
+_TRANSLATION = str.maketrans(_CHAR_MAP)
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize_arabic(text):
+    """توحيد النص العربي للبحث"""
+    return (text or '').translate(_TRANSLATION)
+
+
+def normalize_sql(expression):
+    """تعبير SQL يطبق توحيد normalize_arabic على عمود"""
+    for source, target in _CHAR_MAP.items():
+        expression = f"REPLACE({expression}, '{source}', '{target}')"
+    return expression
+
+
+def match_query(text):
+    """
+    تحويل نص البحث إلى استعلام MATCH: كل كلمة بادئة مطلوبة
+    يرجع None إذا لم يحتو النص على كلمات
+    """
+    tokens = _TOKEN_RE.findall(normalize_arabic(text))
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def bm25_weights(table):
+    """أوزان أعمدة الجدول بترتيبها في الفهرس"""
+    return ', '.join(str(weight) for weight in SEARCH_INDEXES[table].values())
+
+
+def create_search_index(connection, table):
+    """إنشاء فهرس FTS5 للجدول ومشغلات مزامنته وتعبئته بالبيانات الحالية"""
+    fts = f"{table}_fts"
+    columns = list(SEARCH_INDEXES[table])
+    column_list = ', '.join(columns)
+
+    def values(row):
+        return ', '.join(normalize_sql(f"{row}.{column}") for column in columns)
+
+    connection.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {column_list},
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts} (rowid, {column_list})
+            VALUES (NEW.id, {values('NEW')});
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_update
+        AFTER UPDATE OF {column_list} ON {table}
+        BEGIN
+            DELETE FROM {fts} WHERE rowid = OLD.id;
+            INSERT INTO {fts} (rowid, {column_list})
+            VALUES (NEW.id, {values('NEW')});
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM {fts} WHERE rowid = OLD.id;
+        END
+    ''')
+
+    connection.execute(f"DELETE FROM {fts}")
+    connection.execute(f'''
+        INSERT INTO {fts} (rowid, {column_list})
+        SELECT id, {values(table)} FROM {table}
+    ''')
@@ -1 +1,48 @@
+"""
+نقطة تشغيل نظام إدارة المدرسة
 
+الاستخدام:
+    python main.py
+    python main.py --profile-startup    # طباعة تقرير زمن بدء التشغيل عند الإغلاق
+"""
+
+import sys
+from utils import startup_profile
+
+
+def main():
+    # يفعل القياس قبل استيراد Qt وبقية البرنامج حتى يشملها التقرير
+    if '--profile-startup' in sys.argv:
+        startup_profile.enable()
+
+    from PyQt6.QtWidgets import QApplication
+    from ui.login_window import LoginWindow
+
+    app = QApplication(sys.argv)
+    windows = {}
+
+    def open_main_window(user_data):
+        from ui.main_window import MainWindow
+
+        with startup_profile.measure('window', 'main'):
+            window = MainWindow(user_data)
+        startup_profile.watch_first_paint(window, 'main window')
+        window.show()
+        windows['main'] = window
+
+    with startup_profile.measure('window', 'login'):
+        login_window = LoginWindow()
+    login_window.login_successful.connect(open_main_window)
+    startup_profile.watch_first_paint(login_window, 'login window')
+    login_window.show()
+
+    exit_code = app.exec()
+
+    profiler = startup_profile.get_profiler()
+    if profiler is not None:
+        print(profiler.report())
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+إعدادات الاختبارات المشتركة
+قواعد بيانات مؤقتة بمخطط الإصدار الأول من النظام (قبل محرك الترحيل) مع بيانات
+"""
+
+import sqlite3
+import pytest
+import config
+from database.connection_pool import get_pool
+
+# مخطط الإصدار الأول: دون user_version ولا جدول الامتحانات، والحضور بقيد
+# UNIQUE(student_id, date) الذي يمنع حضور كل مادة على حدة
+LEGACY_SCHEMA = '''
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL,
+        full_name TEXT,
+        email TEXT,
+        phone TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id TEXT UNIQUE NOT NULL,
+        full_name TEXT NOT NULL,
+        date_of_birth DATE,
+        gender TEXT,
+        address TEXT,
+        phone TEXT,
+        parent_phone TEXT,
+        class_id INTEGER,
+        enrollment_date DATE DEFAULT CURRENT_DATE,
+        status TEXT DEFAULT 'active',
+        FOREIGN KEY (class_id) REFERENCES classes (id)
+    );
+    CREATE TABLE teachers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        teacher_id TEXT UNIQUE NOT NULL,
+        full_name TEXT NOT NULL,
+        email TEXT,
+        phone TEXT,
+        specialization TEXT,
+        hire_date DATE DEFAULT CURRENT_DATE,
+        user_id INTEGER,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    );
+    CREATE TABLE classes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        class_name TEXT NOT NULL,
+        grade_level INTEGER,
+        section TEXT,
+        capacity INTEGER,
+        academic_year TEXT
+    );
+    CREATE TABLE subjects (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        subject_name TEXT NOT NULL,
+        subject_code TEXT UNIQUE,
+        credits INTEGER,
+        description TEXT
+    );
+    CREATE TABLE grades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL,
+        subject_id INTEGER NOT NULL,
+        exam_type TEXT,
+        score REAL,
+        max_score REAL,
+        date DATE DEFAULT CURRENT_DATE,
+        teacher_id INTEGER,
+        FOREIGN KEY (student_id) REFERENCES students (id),
+        FOREIGN KEY (subject_id) REFERENCES subjects (id),
+        FOREIGN KEY (teacher_id) REFERENCES teachers (id)
+    );
+    CREATE TABLE attendance (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER NOT NULL,
+        date DATE NOT NULL,
+        status TEXT NOT NULL,
+        notes TEXT,
+        FOREIGN KEY (student_id) REFERENCES students (id),
+        UNIQUE(student_id, date)
+    );
+    CREATE TABLE timetable (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        class_id INTEGER NOT NULL,
+        subject_id INTEGER NOT NULL,
+        teacher_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        start_time TIME NOT NULL,
+        end_time TIME NOT NULL,
+        room TEXT,
+        FOREIGN KEY (class_id) REFERENCES classes (id),
+        FOREIGN KEY (subject_id) REFERENCES subjects (id),
+        FOREIGN KEY (teacher_id) REFERENCES teachers (id)
+    );
+    CREATE TABLE notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sender_id INTEGER,
+        recipient_id INTEGER,
+        title TEXT NOT NULL,
+        message TEXT NOT NULL,
+        type TEXT,
+        is_read BOOLEAN DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (sender_id) REFERENCES users (id),
+        FOREIGN KEY (recipient_id) REFERENCES users (id)
+    );
+    CREATE TABLE teacher_subjects (
+        teacher_id INTEGER NOT NULL,
+        subject_id INTEGER NOT NULL,
+        PRIMARY KEY (teacher_id, subject_id),
+        FOREIGN KEY (teacher_id) REFERENCES teachers (id),
+        FOREIGN KEY (subject_id) REFERENCES subjects (id)
+    );
+'''
+
+# ما أضافه create_tables لاحقاً قبل محرك الترحيل: أعمدة الحضور الجديدة
+# والفهرس الفريد مع بقاء القيد القديم في تعريف الجدول
+LEGACY_ATTENDANCE_COLUMNS = '''
+    ALTER TABLE attendance ADD COLUMN check_in_time TEXT;
+    ALTER TABLE attendance ADD COLUMN subject_id INTEGER REFERENCES subjects (id);
+    CREATE UNIQUE INDEX idx_attendance_student_date_subject
+    ON attendance (student_id, date, IFNULL(subject_id, 0));
+'''
+
+LEGACY_DATA = '''
+    INSERT INTO users (username, password, role, full_name)
+    VALUES ('admin', 'x', 'admin', 'مدير النظام');
+    INSERT INTO classes (class_name, grade_level, section, capacity, academic_year)
+    VALUES ('الأول أ', 1, 'أ', 30, '2025-2026'),
+           ('الثاني ب', 2, 'ب', 25, '2025-2026');
+    INSERT INTO subjects (subject_name, subject_code, credits, description)
+    VALUES ('الرياضيات', 'MATH', 4, 'جبر وهندسة'),
+           ('اللغة العربية', 'ARAB', 5, NULL);
+    INSERT INTO teachers (teacher_id, full_name, email, specialization)
+    VALUES ('T1', 'خالد إبراهيم', 'k@school.test', 'رياضيات');
+    INSERT INTO students (student_id, full_name, gender, phone, class_id, status)
+    VALUES ('S1', 'أحمد علي', 'ذكر', '0770', 1, 'active'),
+           ('S2', 'فاطمة حسن', 'أنثى', NULL, 1, 'active'),
+           ('S3', 'مصطفى يحيى', 'ذكر', NULL, 2, 'inactive');
+    INSERT INTO grades (student_id, subject_id, exam_type, score, max_score, date, teacher_id)
+    VALUES (1, 1, 'شهري', 95, 100, '2025-10-05', 1),
+           (2, 1, 'شهري', 72, 100, '2025-10-05', 1),
+           (1, 2, 'نهائي', 40, 50, '2025-11-20', 1),
+           (3, 2, 'نهائي', NULL, 50, '2025-11-20', 1);
+    INSERT INTO attendance (student_id, date, status, notes)
+    VALUES (1, '2025-10-01', 'present', ''),
+           (2, '2025-10-01', 'absent', 'مريضة'),
+           (3, '2025-10-01', 'present', ''),
+           (1, '2025-10-02', 'late', '');
+    INSERT INTO teacher_subjects (teacher_id, subject_id) VALUES (1, 1), (1, 2);
+    INSERT INTO timetable (class_id, subject_id, teacher_id, day, start_time, end_time)
+    VALUES (1, 1, 1, 'الأحد', '08:00', '08:45');
+    INSERT INTO notifications (sender_id, recipient_id, title, message)
+    VALUES (1, 1, 'تنبيه', 'اجتماع أولياء الأمور');
+'''
+
+
+@pytest.fixture(params=['baseline', 'columns_added'])
+def legacy_db(request, tmp_path):
+    """
+    مسار قاعدة بيانات بمخطط ما قبل الترحيل وبياناته، بحالتيها: الإصدار الأول،
+    وبعد إضافة أعمدة الحضور في مكانها (القيد القديم باق)
+    """
+    path = str(tmp_path / 'legacy.db')
+    connection = sqlite3.connect(path)
+    connection.executescript(LEGACY_SCHEMA)
+    if request.param == 'columns_added':
+        connection.executescript(LEGACY_ATTENDANCE_COLUMNS)
+    connection.executescript(LEGACY_DATA)
+    connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def use_database(monkeypatch):
+    """جعل قاعدة بيانات مؤقتة قاعدة بيانات البرنامج (config.DATABASE_PATH)"""
+    paths = []
+
+    def use(path):
+        monkeypatch.setattr(config, 'DATABASE_PATH', path)
+        paths.append(path)
+        return path
+
+    yield use
+    for path in paths:
+        get_pool(path).close_all()
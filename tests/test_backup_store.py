@@ -0,0 +1,250 @@
+"""اختبارات مخزن النسخ الاحتياطية التزايدية (utils/backup_store.py)"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import pytest
+import config
+from utils.backup_store import BackupStore, quick_check
+from utils.compression import CODECS, compress_chunk
+
+PAGE_SIZE = 4096
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # مقاطع صغيرة (صفحتان) حتى تتوزع قاعدة بيانات الاختبار على مقاطع كثيرة
+    monkeypatch.setattr(config, 'BACKUP_CHUNK_PAGES', 2)
+    monkeypatch.setattr(config, 'BACKUP_FULL_EVERY', 24)
+    return BackupStore(str(tmp_path / 'store'))
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'school.db')
+    connection = sqlite3.connect(path)
+    connection.execute(f"PRAGMA page_size = {PAGE_SIZE}")
+    connection.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)")
+    connection.execute("CREATE INDEX idx_notes_body ON notes (body)")
+    connection.executemany(
+        "INSERT INTO notes (body) VALUES (?)",
+        [(f"ملاحظة رقم {i} " * 8,) for i in range(2000)]
+    )
+    connection.commit()
+    connection.close()
+    return path
+
+
+def update(path, sql, *params):
+    connection = sqlite3.connect(path)
+    connection.execute(sql, params)
+    connection.commit()
+    connection.close()
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def backup(store, database, codec='deflate-1'):
+    """نسخة من الملف الحالي مع محتواه المتوقع عند الاستعادة"""
+    return store.create(database, codec)['id'], read(database)
+
+
+def restored(store, backup_id, tmp_path):
+    target = str(tmp_path / f"restored_{backup_id}.db")
+    store.restore(backup_id, target)
+    return read(target)
+
+
+def chunk_files(store):
+    return {
+        name for prefix in os.listdir(store.chunks_dir)
+        for name in os.listdir(os.path.join(store.chunks_dir, prefix))
+    }
+
+
+@pytest.mark.parametrize('codec', list(CODECS))
+def test_create_restore_round_trip(store, database, tmp_path, codec):
+    base_id, base_data = backup(store, database, codec)
+    update(database, "UPDATE notes SET body = 'تعديل' WHERE id = 1000")
+    delta_id, delta_data = backup(store, database, codec)
+
+    base, delta = store.load(base_id), store.load(delta_id)
+    assert base['backup_type'] == 'base' and base['parent'] is None
+    assert len(base['chunks']) == base['chunk_count'] == -(-len(base_data) // (2 * PAGE_SIZE))
+    assert delta['backup_type'] == 'incremental' and delta['parent'] == base_id
+    assert 0 < len(delta['chunks']) < delta['chunk_count']
+    assert delta['codec'] == codec
+
+    assert restored(store, base_id, tmp_path) == base_data
+    assert restored(store, delta_id, tmp_path) == delta_data
+
+
+def test_unchanged_database_adds_no_chunks(store, database, tmp_path):
+    backup(store, database)
+    backup_id, data = backup(store, database)
+
+    manifest = store.load(backup_id)
+    assert manifest['chunks'] == {}
+    assert manifest['new_chunks'] == manifest['new_bytes'] == 0
+    assert restored(store, backup_id, tmp_path) == data
+
+
+def test_growing_and_shrinking_database(store, database, tmp_path):
+    backups = [backup(store, database)]
+    update(database, "INSERT INTO notes (body) SELECT body || 'x' FROM notes")
+    backups.append(backup(store, database))
+    update(database, "DELETE FROM notes WHERE id > 100")
+    update(database, "VACUUM")
+    backups.append(backup(store, database))
+
+    assert len(backups[1][1]) > len(backups[0][1]) > len(backups[2][1])
+    for backup_id, data in backups:
+        assert restored(store, backup_id, tmp_path) == data
+
+
+def test_full_backup_every_n(store, database, monkeypatch):
+    monkeypatch.setattr(config, 'BACKUP_FULL_EVERY', 2)
+    types = []
+    for i in range(5):
+        update(database, "UPDATE notes SET body = ? WHERE id = 1", str(i))
+        types.append(store.load(backup(store, database)[0])['backup_type'])
+    assert types == ['base', 'incremental', 'base', 'incremental', 'base']
+
+
+@pytest.mark.parametrize('deleted', [0, 1, 2])
+def test_delete_merges_into_children(store, database, tmp_path, deleted):
+    backups = []
+    for i in range(4):
+        update(database, "UPDATE notes SET body = ? WHERE id = ?", f"تغيير {i}", 1 + 600 * i)
+        backups.append(backup(store, database))
+
+    store.delete(backups[deleted][0])
+    kept = backups[:deleted] + backups[deleted + 1:]
+
+    assert store.backup_ids() == [backup_id for backup_id, data in kept]
+    assert store.load(kept[0][0])['parent'] is None
+    assert store.load(kept[0][0])['backup_type'] == 'base'
+    for backup_id, data in kept:
+        assert restored(store, backup_id, tmp_path) == data
+    # لا مقاطع يتيمة بعد الحذف
+    referenced = {
+        digest for manifest in store.manifests() for digest in manifest['chunks'].values()
+    }
+    assert chunk_files(store) == referenced
+
+
+def test_prune_keeps_latest_and_collects_chunks(store, database, tmp_path):
+    backups = []
+    for i in range(6):
+        update(database, "UPDATE notes SET body = ? WHERE id % 7 = ?", f"دورة {i}", i)
+        backups.append(backup(store, database))
+    before = len(chunk_files(store))
+
+    store.prune(2)
+
+    assert store.backup_ids() == [backup_id for backup_id, data in backups[-2:]]
+    for backup_id, data in backups[-2:]:
+        assert restored(store, backup_id, tmp_path) == data
+    assert len(chunk_files(store)) < before
+    assert store.collect_garbage() == 0
+
+
+def test_collect_garbage_removes_orphan_chunks(store, database):
+    backup_id, data = backup(store, database)
+    digest, written = store.put_chunk(b'orphan' * 100, 'deflate-1')
+    assert written and store.has_chunk(digest)
+
+    assert store.collect_garbage() == 1
+    assert not store.has_chunk(digest)
+    assert all(store.has_chunk(d) for d in store.resolve(backup_id))
+
+
+def test_collect_garbage_waits_for_create_in_progress(store, database, monkeypatch):
+    # تنظيف من خيط آخر (حذف نسخة من الواجهة) بعد كتابة أول مقطع وقبل ملف الوصف
+    cleaners = []
+    put_chunk = store.put_chunk
+
+    def put_chunk_then_clean(data, codec):
+        result = put_chunk(data, codec)
+        if not cleaners:
+            cleaner = threading.Thread(target=BackupStore(store.root).collect_garbage)
+            cleaner.start()
+            cleaner.join(0.2)
+            cleaners.append(cleaner)
+        return result
+
+    monkeypatch.setattr(store, 'put_chunk', put_chunk_then_clean)
+    backup_id, data = backup(store, database)
+    cleaners[0].join()
+
+    assert all(store.has_chunk(digest) for digest in store.resolve(backup_id))
+
+
+def test_verify_healthy_backups(store, database):
+    base_id, data = backup(store, database)
+    update(database, "UPDATE notes SET body = 'x' WHERE id = 5")
+    delta_id, data = backup(store, database)
+
+    verified = set()
+    assert store.verify(base_id, verified=verified)[0]
+    assert verified == set(store.resolve(base_id))
+    assert store.verify(delta_id, verified=verified)[0]
+    # لا تبقى ملفات مؤقتة
+    assert sorted(os.listdir(store.root)) == ['chunks', 'manifests']
+
+
+def test_verify_detects_corrupted_chunk(store, database):
+    base_id, data = backup(store, database)
+    update(database, "UPDATE notes SET body = 'x' WHERE id = 5")
+    delta_id, data = backup(store, database)
+    digest = store.resolve(base_id)[3]
+    # ضغط سليم ومحتوى مختلف: لا يكشفه إلا مقارنة البصمة
+    with open(store.chunk_path(digest), 'wb') as f:
+        f.write(compress_chunk('deflate-1', b'\0' * 2 * PAGE_SIZE))
+
+    assert not store.check_chunk(digest)
+    for backup_id in (base_id, delta_id):
+        ok, message = store.verify(backup_id)
+        assert not ok and message.endswith(': 1')
+
+
+@pytest.mark.parametrize('damage', ['truncated', 'missing'])
+def test_verify_detects_unreadable_chunk(store, database, damage):
+    backup_id, data = backup(store, database, 'lzma')
+    path = store.chunk_path(store.resolve(backup_id)[0])
+    if damage == 'truncated':
+        with open(path, 'r+b') as f:
+            f.truncate(10)
+    else:
+        os.remove(path)
+
+    assert not store.verify(backup_id)[0]
+
+
+def test_verify_runs_quick_check_on_restored_copy(store, database, tmp_path):
+    # الصفحات تالفة قبل النسخ، فبصمات المقاطع صحيحة والتلف في قاعدة البيانات
+    damaged = str(tmp_path / 'damaged.db')
+    shutil.copy(database, damaged)
+    with open(damaged, 'r+b') as f:
+        f.seek(os.path.getsize(damaged) // 2)
+        f.write(b'\xff' * PAGE_SIZE)
+    backup_id, data = backup(store, damaged)
+
+    assert all(store.check_chunk(digest) for digest in store.resolve(backup_id))
+    assert not store.verify(backup_id)[0]
+
+
+def test_quick_check(database, tmp_path):
+    assert quick_check(database) == (True, ['ok'])
+
+    damaged = str(tmp_path / 'damaged.db')
+    shutil.copy(database, damaged)
+    with open(damaged, 'r+b') as f:
+        f.seek(PAGE_SIZE)
+        f.write(b'\xff' * PAGE_SIZE)
+    ok, messages = quick_check(damaged)
+    assert not ok and messages
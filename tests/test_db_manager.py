@@ -0,0 +1,70 @@
+"""اختبارات عمليات DatabaseManager على قواعد بيانات قائمة"""
+
+from database.db_manager import DatabaseManager
+
+
+def attendance_rows(db, date):
+    return [tuple(row) for row in db.connection.execute('''
+        SELECT student_id, subject_id, status, notes FROM attendance
+        WHERE date = ? ORDER BY student_id, IFNULL(subject_id, 0)
+    ''', (date,))]
+
+
+def test_save_attendance_sheet_per_subject_on_legacy_database(legacy_db, use_database):
+    use_database(legacy_db)
+    db = DatabaseManager()
+    db.save_attendance_sheet([
+        {'student_id': 1, 'date': '2025-10-03', 'subject_id': None, 'status': 'present'},
+        {'student_id': 1, 'date': '2025-10-03', 'subject_id': 1, 'status': 'present'},
+        {'student_id': 1, 'date': '2025-10-03', 'subject_id': 2, 'status': 'absent'},
+        {'student_id': 2, 'date': '2025-10-03', 'subject_id': 1, 'status': 'late'}
+    ])
+    # إعادة حفظ كشف المادة تحدث سجلاتها فقط
+    db.save_attendance_sheet([
+        {'student_id': 1, 'date': '2025-10-03', 'subject_id': 1,
+         'status': 'excused', 'notes': 'إذن'}
+    ])
+
+    assert attendance_rows(db, '2025-10-03') == [
+        (1, None, 'present', ''),
+        (1, 1, 'excused', 'إذن'),
+        (1, 2, 'absent', ''),
+        (2, 1, 'late', '')
+    ]
+    sheet = db.get_attendance_sheet(1, '2025-10-03', 2)
+    assert [(row['id'], row['status']) for row in sheet] == [(1, 'absent'), (2, None)]
+
+
+def test_mark_attendance_updates_the_whole_day_record(legacy_db, use_database):
+    use_database(legacy_db)
+    db = DatabaseManager()
+    db.mark_attendance({'student_id': 2, 'date': '2025-10-01', 'status': 'present'})
+
+    assert attendance_rows(db, '2025-10-01') == [
+        (1, None, 'present', ''),
+        (2, None, 'present', ''),
+        (3, None, 'present', '')
+    ]
+
+
+def test_save_exam_grades_counts_inserted_and_updated(legacy_db, use_database):
+    use_database(legacy_db)
+    db = DatabaseManager()
+    db.connection.execute('''
+        INSERT INTO exams (exam_name, max_score, class_id, subject_id)
+        VALUES ('الشهر الأول', 100, 1, 1)
+    ''')
+    db.connection.commit()
+
+    assert db.save_exam_grades(1, [
+        {'student_id': 1, 'score': 90},
+        {'student_id': 2, 'score': 65}
+    ]) == {'inserted': 2, 'updated': 0}
+    assert db.save_exam_grades(1, [
+        {'student_id': 1, 'score': 92},
+        {'student_id': 2, 'score': 65},
+        {'student_id': 3, 'score': 50, 'notes': 'متأخر'}
+    ]) == {'inserted': 1, 'updated': 2}
+
+    sheet = db.get_exam_grade_sheet(1, 1)
+    assert [(row['id'], row['score']) for row in sheet] == [(1, 92), (2, 65)]
@@ -0,0 +1,206 @@
+"""اختبارات ترحيل مخطط قاعدة البيانات (database/migrations.py)"""
+
+import sqlite3
+import pytest
+from database import migrations
+from database.connection_pool import connect
+from database.migrations import LATEST_VERSION, MIGRATIONS, get_version, migrate
+from database.search import match_query
+
+# أعمدة المخطط الأول لكل جدول: يجب أن تبقى قيمها كما هي بعد الترحيل
+LEGACY_COLUMNS = {
+    'users': 'id, username, password, role, full_name',
+    'classes': 'id, class_name, grade_level, section, capacity, academic_year',
+    'subjects': 'id, subject_name, subject_code, credits, description',
+    'teachers': 'id, teacher_id, full_name, email, specialization',
+    'students': 'id, student_id, full_name, gender, phone, class_id, status',
+    'grades': 'id, student_id, subject_id, exam_type, score, max_score, date, teacher_id',
+    'attendance': 'id, student_id, date, status, notes',
+    'teacher_subjects': 'teacher_id, subject_id',
+    'timetable': 'id, class_id, subject_id, teacher_id, day, start_time, end_time',
+    'notifications': 'id, sender_id, recipient_id, title, message'
+}
+
+
+def snapshot(connection):
+    return {
+        table: [tuple(row) for row in connection.execute(
+            f"SELECT {columns} FROM {table} ORDER BY {columns}"
+        )]
+        for table, columns in LEGACY_COLUMNS.items()
+    }
+
+
+def schema(connection):
+    return sorted(
+        tuple(row) for row in
+        connection.execute("SELECT type, name, sql FROM sqlite_master")
+    )
+
+
+@pytest.fixture
+def connection(legacy_db):
+    connection = connect(legacy_db)
+    yield connection
+    connection.close()
+
+
+def test_migrates_legacy_database_to_latest_version(connection):
+    before = snapshot(connection)
+    assert get_version(connection) == 0
+
+    assert migrate(connection) == LATEST_VERSION
+    assert get_version(connection) == LATEST_VERSION
+    applied = [row[0] for row in connection.execute(
+        "SELECT version FROM schema_version ORDER BY version"
+    )]
+    assert applied == [number for number, description, migration in MIGRATIONS]
+    assert snapshot(connection) == before
+
+
+def test_migrate_is_noop_when_current(connection):
+    migrate(connection)
+    connection.execute("INSERT INTO students (student_id, full_name) VALUES ('S9', 'سعاد')")
+    connection.commit()
+    schema_before = schema(connection)
+    data_before = snapshot(connection)
+    history = connection.execute("SELECT * FROM schema_version").fetchall()
+    changes = connection.total_changes
+
+    assert migrate(connection) == LATEST_VERSION
+    assert connection.total_changes == changes
+    assert schema(connection) == schema_before
+    assert snapshot(connection) == data_before
+    assert connection.execute("SELECT * FROM schema_version").fetchall() == history
+
+
+def test_new_database_migrates_from_empty(tmp_path):
+    connection = connect(str(tmp_path / 'new.db'))
+    try:
+        assert migrate(connection) == LATEST_VERSION
+        assert connection.execute(
+            "SELECT role FROM users WHERE username = 'admin'"
+        ).fetchone()[0] == 'admin'
+    finally:
+        connection.close()
+
+
+def test_attendance_rebuild_allows_one_row_per_subject(connection):
+    migrate(connection)
+    connection.execute('''
+        INSERT INTO attendance (student_id, date, status, subject_id)
+        VALUES (2, '2025-10-02', 'present', 1), (2, '2025-10-02', 'absent', 2)
+    ''')
+    with pytest.raises(sqlite3.IntegrityError):
+        connection.execute('''
+            INSERT INTO attendance (student_id, date, status, subject_id)
+            VALUES (2, '2025-10-02', 'late', 1)
+        ''')
+    # سجل اليوم كاملاً (دون مادة) فريد أيضاً
+    with pytest.raises(sqlite3.IntegrityError):
+        connection.execute('''
+            INSERT INTO attendance (student_id, date, status)
+            VALUES (1, '2025-10-01', 'absent')
+        ''')
+
+
+def test_attendance_rebuild_resumes_and_keeps_concurrent_writes(connection, monkeypatch):
+    # الترحيل حتى ما قبل إعادة البناء، ثم نسخ دفعة واحدة فقط كأنه توقف
+    monkeypatch.setattr(migrations, 'MIGRATIONS', MIGRATIONS[:2])
+    monkeypatch.setattr(migrations, 'LATEST_VERSION', 2)
+    migrate(connection)
+    monkeypatch.undo()
+
+    rebuild = migrations._rebuild_attendance
+    with migrations.transaction(connection):
+        rebuild.prepare(connection)
+    with migrations.transaction(connection):
+        rebuild.copy_batch(connection, 0, 2)
+
+    # كتابة من اتصال آخر أثناء النسخ تنقلها المشغلات
+    other = connect(connection.execute("PRAGMA database_list").fetchone()[2])
+    other.execute("UPDATE attendance SET status = 'excused' WHERE id = 1")
+    other.execute("UPDATE attendance SET notes = 'متأخر' WHERE id = 4")
+    other.execute("DELETE FROM attendance WHERE id = 3")
+    other.execute('''
+        INSERT INTO attendance (student_id, date, status) VALUES (2, '2025-10-02', 'present')
+    ''')
+    other.commit()
+    expected = [tuple(row) for row in other.execute(
+        "SELECT id, student_id, date, status, notes FROM attendance ORDER BY id"
+    )]
+    other.close()
+
+    assert migrate(connection, batch_size=1) == LATEST_VERSION
+    assert [tuple(row) for row in connection.execute(
+        "SELECT id, student_id, date, status, notes FROM attendance ORDER BY id"
+    )] == expected
+    assert connection.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE name LIKE 'attendance_new%'"
+    ).fetchone()[0] == 0
+
+
+def test_rollups_are_backfilled(connection):
+    migrate(connection)
+    daily = connection.execute('''
+        SELECT date, SUM(present), SUM(total) FROM attendance_daily
+        GROUP BY date ORDER BY date
+    ''').fetchall()
+    assert [tuple(row) for row in daily] == [('2025-10-01', 2, 3), ('2025-10-02', 0, 1)]
+
+    bands = connection.execute(
+        "SELECT month, band, count FROM grade_bands ORDER BY month, band"
+    ).fetchall()
+    assert [tuple(row) for row in bands] == [
+        ('2025-10', 'excellent', 1), ('2025-10', 'good', 1), ('2025-11', 'very_good', 1)
+    ]
+
+
+def test_rollups_follow_writes(connection):
+    migrate(connection)
+    connection.execute("UPDATE attendance SET status = 'present' WHERE id = 2")
+    connection.execute("DELETE FROM attendance WHERE id = 4")
+    connection.execute("UPDATE grades SET score = 55 WHERE id = 1")
+    connection.commit()
+
+    daily = connection.execute(
+        "SELECT date, SUM(present), SUM(total) FROM attendance_daily GROUP BY date ORDER BY date"
+    ).fetchall()
+    assert [tuple(row) for row in daily] == [('2025-10-01', 3, 3), ('2025-10-02', 0, 0)]
+    bands = connection.execute(
+        "SELECT band, count FROM grade_bands WHERE month = '2025-10' ORDER BY band"
+    ).fetchall()
+    assert [tuple(row) for row in bands] == [('excellent', 0), ('fail', 1), ('good', 1)]
+
+
+def test_search_index_normalizes_arabic(connection):
+    migrate(connection)
+
+    def search(text):
+        return [row[0] for row in connection.execute(
+            "SELECT rowid FROM students_fts WHERE students_fts MATCH ? ORDER BY rowid",
+            (match_query(text),)
+        )]
+
+    # همزة الألف والتاء المربوطة والألف المقصورة
+    assert search('احمد') == [1]
+    assert search('فاطمه') == [2]
+    assert search('يحيي') == [3]
+
+    connection.execute("UPDATE students SET full_name = 'إيمان' WHERE id = 1")
+    assert search('احمد') == []
+    assert search('ايم') == [1]
+
+
+def test_activity_log_ignores_unchanged_grades(connection):
+    migrate(connection)
+
+    def entered():
+        return connection.execute(
+            "SELECT IFNULL(SUM(count), 0) FROM activity_log WHERE action = 'grades_entered'"
+        ).fetchone()[0]
+
+    connection.execute("UPDATE grades SET score = score")
+    assert entered() == 0
+    connection.execute("UPDATE grades SET score = 60 WHERE id = 4")
+    assert entered() == 1
@@ -2,7 +2,7 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                            QTableWidget, QTableWidgetItem, QComboBox, QDialog,
                            QFormLayout, QMessageBox, QLabel, QDateEdit,
                            QHeaderView, QAbstractItemView, QCheckBox,
-                           QTextEdit, QCalendarWidget)
+                           QTextEdit, QCalendarWidget, QLineEdit)
 from PyQt6.QtCore import Qt, QDate, pyqtSignal, QTimer
 from PyQt6.QtGui import QColor, QFont
 from database.db_manager import DatabaseManager
@@ -220,44 +220,35 @@ class AttendanceManagement(QWidget):
         if not class_id:
             return
         
-        # جلب الطلاب
-        students = self.db.cursor.execute(
-            """SELECT id, full_name, student_id 
-               FROM students 
-               WHERE class_id = ?
-               ORDER BY full_name""",
-            (class_id,)
-        ).fetchall()
-        
         # التاريخ المحدد
         date = self.date_picker.date().toString('yyyy-MM-dd')
         subject_id = self.subject_filter.currentData()
         
-        for student in students:
-            self.add_student_to_table(student, date, subject_id)
+        # جلب الطلاب مع سجلات حضورهم في استعلام واحد
+        sheet = self.db.get_attendance_sheet(class_id, date, subject_id)
+        
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(len(sheet))
+        for row, record in enumerate(sheet):
+            self.add_student_to_table(row, record)
+        self.table.setUpdatesEnabled(True)
         
         self.update_info_labels()
     
-    def add_student_to_table(self, student, date, subject_id):
+    def add_student_to_table(self, row, record):
         """إضافة طالب إلى جدول الحضور"""
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        
         # اسم الطالب
-        self.table.setItem(row, 0, QTableWidgetItem(student[1]))
-        self.table.item(row, 0).setData(Qt.ItemDataRole.UserRole, student[0])
+        self.table.setItem(row, 0, QTableWidgetItem(record['full_name']))
+        self.table.item(row, 0).setData(Qt.ItemDataRole.UserRole, record['id'])
         
         # رقم الطالب
-        self.table.setItem(row, 1, QTableWidgetItem(student[2]))
-        
-        # البحث عن سجل الحضور
-        attendance = self.db.cursor.execute(
-            """SELECT status, check_in_time, notes 
-               FROM attendance 
-               WHERE student_id = ? AND date = ? 
-               AND (subject_id = ? OR (? IS NULL AND subject_id IS NULL))""",
-            (student[0], date, subject_id, subject_id)
-        ).fetchone()
+        self.table.setItem(row, 1, QTableWidgetItem(record['student_id']))
+        
+        # سجل الحضور (إن وجد)
+        attendance = (
+            (record['status'], record['check_in_time'], record['notes'])
+            if record['status'] else None
+        )
         
         # إنشاء ودجت الحالة
         status_widget = QComboBox()
@@ -330,43 +321,20 @@ class AttendanceManagement(QWidget):
         subject_id = self.subject_filter.currentData()
         
         try:
+            records = []
             for row in range(self.table.rowCount()):
-                student_id = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
-                status_widget = self.table.cellWidget(row, 2)
                 time_widget = self.table.cellWidget(row, 3)
-                notes_widget = self.table.cellWidget(row, 4)
-                
-                status = status_widget.currentData()
-                check_in_time = time_widget.text().strip() if time_widget.text().strip() else None
-                notes = notes_widget.text().strip()
-                
-                # التحقق من وجود سجل سابق
-                existing = self.db.cursor.execute(
-                    """SELECT id FROM attendance 
-                       WHERE student_id = ? AND date = ? 
-                       AND (subject_id = ? OR (? IS NULL AND subject_id IS NULL))""",
-                    (student_id, date, subject_id, subject_id)
-                ).fetchone()
-                
-                # ... تكملة من الكود السابق
-                if existing:
-                    # تحديث السجل الموجود
-                    self.db.cursor.execute(
-                        """UPDATE attendance 
-                           SET status = ?, check_in_time = ?, notes = ?
-                           WHERE id = ?""",
-                        (status, check_in_time, notes, existing[0])
-                    )
-                else:
-                    # إضافة سجل جديد
-                    self.db.cursor.execute(
-                        """INSERT INTO attendance 
-                           (student_id, date, status, check_in_time, notes, subject_id)
-                           VALUES (?, ?, ?, ?, ?, ?)""",
-                        (student_id, date, status, check_in_time, notes, subject_id)
-                    )
+                records.append({
+                    'student_id': self.table.item(row, 0).data(Qt.ItemDataRole.UserRole),
+                    'date': date,
+                    'subject_id': subject_id,
+                    'status': self.table.cellWidget(row, 2).currentData(),
+                    'check_in_time': time_widget.text().strip() or None,
+                    'notes': self.table.cellWidget(row, 4).text().strip()
+                })
             
-            self.db.connection.commit()
+            # حفظ الكشف كاملاً في عملية واحدة
+            self.db.save_attendance_sheet(records)
             QMessageBox.information(
                 self, tr('success', self.language),
                 tr('attendance_saved_success', self.language)
@@ -592,43 +560,29 @@ class AttendanceStatisticsDialog(QDialog):
         from_date = self.from_date.date().toString('yyyy-MM-dd')
         to_date = self.to_date.date().toString('yyyy-MM-dd')
         
+        # إحصائيات الصف والطلاب في استعلام واحد
+        statistics = self.db.get_class_attendance_statistics(
+            self.class_id, from_date, to_date
+        )
+        
         # إحصائيات عامة
-        self.load_general_statistics(from_date, to_date)
+        self.load_general_statistics(statistics)
         
         # إحصائيات الطلاب
-        self.load_student_statistics(from_date, to_date)
+        self.load_student_statistics(statistics['students'])
     
-    def load_general_statistics(self, from_date, to_date):
+    def load_general_statistics(self, statistics):
         """تحميل الإحصائيات العامة"""
         # مسح الويدجات السابقة
         for i in reversed(range(self.general_layout.count())): 
             self.general_layout.itemAt(i).widget().setParent(None)
         
-        # إجمالي الأيام الدراسية
-        total_days = self.db.cursor.execute(
-            """SELECT COUNT(DISTINCT date) FROM attendance 
-               WHERE date BETWEEN ? AND ? AND student_id IN 
-               (SELECT id FROM students WHERE class_id = ?)""",
-            (from_date, to_date, self.class_id)
-        ).fetchone()[0]
-        
-        # إحصائيات الحضور
-        stats = self.db.cursor.execute(
-            """SELECT status, COUNT(*) FROM attendance 
-               WHERE date BETWEEN ? AND ? AND student_id IN 
-               (SELECT id FROM students WHERE class_id = ?)
-               GROUP BY status""",
-            (from_date, to_date, self.class_id)
-        ).fetchall()
-        
-        stats_dict = dict(stats)
-        
         # عرض الإحصائيات
-        self.add_stat_widget(tr('total_school_days', self.language), str(total_days))
-        self.add_stat_widget(tr('total_present', self.language), str(stats_dict.get('present', 0)))
-        self.add_stat_widget(tr('total_absent', self.language), str(stats_dict.get('absent', 0)))
-        self.add_stat_widget(tr('total_late', self.language), str(stats_dict.get('late', 0)))
-        self.add_stat_widget(tr('total_excused', self.language), str(stats_dict.get('excused', 0)))
+        self.add_stat_widget(tr('total_school_days', self.language), str(statistics['school_days']))
+        self.add_stat_widget(tr('total_present', self.language), str(statistics['present']))
+        self.add_stat_widget(tr('total_absent', self.language), str(statistics['absent']))
+        self.add_stat_widget(tr('total_late', self.language), str(statistics['late']))
+        self.add_stat_widget(tr('total_excused', self.language), str(statistics['excused']))
     
     def add_stat_widget(self, label, value):
         """إضافة ويدجت إحصائية"""
@@ -647,43 +601,23 @@ class AttendanceStatisticsDialog(QDialog):
         
         self.general_layout.addWidget(widget)
     
-    def load_student_statistics(self, from_date, to_date):
+    def load_student_statistics(self, students):
         """تحميل إحصائيات الطلاب"""
-        # جلب الطلاب
-        students = self.db.cursor.execute(
-            """SELECT id, full_name FROM students 
-               WHERE class_id = ? ORDER BY full_name""",
-            (self.class_id,)
-        ).fetchall()
-        
         self.students_table.setRowCount(len(students))
         
-        for row, student in enumerate(students):
+        for row, stats in enumerate(students):
             # اسم الطالب
-            self.students_table.setItem(row, 0, QTableWidgetItem(student[1]))
-            
-            # إحصائيات الحضور
-            stats = self.db.cursor.execute(
-                """SELECT 
-                   COUNT(*) as total,
-                   SUM(CASE WHEN status = 'present' THEN 1 ELSE 0 END) as present,
-                   SUM(CASE WHEN status = 'absent' THEN 1 ELSE 0 END) as absent,
-                   SUM(CASE WHEN status = 'late' THEN 1 ELSE 0 END) as late,
-                   SUM(CASE WHEN status = 'excused' THEN 1 ELSE 0 END) as excused
-                   FROM attendance 
-                   WHERE student_id = ? AND date BETWEEN ? AND ?""",
-                (student[0], from_date, to_date)
-            ).fetchone()
+            self.students_table.setItem(row, 0, QTableWidgetItem(stats['full_name']))
             
-            if stats and stats[0] > 0:
-                self.students_table.setItem(row, 1, QTableWidgetItem(str(stats[0])))
-                self.students_table.setItem(row, 2, QTableWidgetItem(str(stats[1])))
-                self.students_table.setItem(row, 3, QTableWidgetItem(str(stats[2])))
-                self.students_table.setItem(row, 4, QTableWidgetItem(str(stats[3])))
-                self.students_table.setItem(row, 5, QTableWidgetItem(str(stats[4])))
+            if stats['total'] > 0:
+                self.students_table.setItem(row, 1, QTableWidgetItem(str(stats['total'])))
+                self.students_table.setItem(row, 2, QTableWidgetItem(str(stats['present'])))
+                self.students_table.setItem(row, 3, QTableWidgetItem(str(stats['absent'])))
+                self.students_table.setItem(row, 4, QTableWidgetItem(str(stats['late'])))
+                self.students_table.setItem(row, 5, QTableWidgetItem(str(stats['excused'])))
                 
                 # نسبة الحضور
-                attendance_rate = ((stats[1] + stats[3]) / stats[0]) * 100
+                attendance_rate = ((stats['present'] + stats['late']) / stats['total']) * 100
                 rate_item = QTableWidgetItem(f"{attendance_rate:.1f}%")
                 
                 # تلوين حسب النسبة
@@ -7,7 +7,9 @@ from PyQt6.QtCore import Qt, QDate, pyqtSignal
 from PyQt6.QtGui import QColor
 from database.db_manager import DatabaseManager
 from utils.translations import tr
+from utils.export import run_export
 import datetime
+import itertools
 
 class GradesManagement(QWidget):
     def __init__(self, language='ar', user_data=None):
@@ -408,11 +410,20 @@ class GradesManagement(QWidget):
                 QMessageBox.critical(self, tr('error', self.language), str(e))
     
     def export_grades(self):
-        """تصدير الدرجات إلى Excel"""
+        """تصدير الدرجات في الخلفية مباشرة من قاعدة البيانات"""
         from PyQt6.QtWidgets import QFileDialog
-        import pandas as pd
         
-        if self.table.rowCount() == 0:
+        dialog = GradesExportDialog(self.language, parent=self)
+        if not dialog.exec():
+            return
+        options = dialog.get_options()
+        
+        filters = {'exam_type': self.exam_type_filter.currentData()}
+        if options['scope'] == 'current':
+            filters['class_id'] = self.class_filter.currentData()
+            filters['subject_id'] = self.subject_filter.currentData()
+        
+        if self.db.count_grades_for_export(**filters) == 0:
             QMessageBox.warning(
                 self, tr('warning', self.language),
                 tr('no_data_to_export', self.language)
@@ -423,37 +434,51 @@ class GradesManagement(QWidget):
             self,
             tr('save_file', self.language),
             f"grades_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-            "Excel Files (*.xlsx)"
+            "Excel Files (*.xlsx);;CSV Files (*.csv)"
         )
         
         if file_path:
-            try:
-                # جمع البيانات
-                data = []
-                headers = []
-                
-                # ... تكملة من الكود السابق
-                for col in range(self.table.columnCount() - 1):  # استثناء عمود الإجراءات
-                    headers.append(self.table.horizontalHeaderItem(col).text())
-                
-                for row in range(self.table.rowCount()):
-                    row_data = []
-                    for col in range(self.table.columnCount() - 1):
-                        item = self.table.item(row, col)
-                        row_data.append(item.text() if item else '')
-                    data.append(row_data)
-                
-                # إنشاء DataFrame وحفظه
-                df = pd.DataFrame(data, columns=headers)
-                df.to_excel(file_path, index=False)
-                
-                QMessageBox.information(
-                    self,
-                    tr('success', self.language),
-                    tr('export_success', self.language)
+            headers = [
+                tr(key, self.language) for key in (
+                    'class', 'subject', 'exam_name', 'exam_type', 'date',
+                    'student_name', 'student_id', 'score', 'max_score',
+                    'percentage', 'grade', 'notes'
                 )
-            except Exception as e:
-                QMessageBox.critical(self, tr('error', self.language), str(e))
+            ]
+            group_by = options['group_by']
+            default_title = tr('grades', self.language)
+            
+            def job(db):
+                grades = db.iter_grades_for_export(group_by, **filters)
+                # ورقة لكل مجموعة متتالية من الصفوف (الاستعلام مرتب حسب المجموعة)
+                sheets = (
+                    (title or default_title, headers,
+                     (self.format_export_row(grade) for grade in rows))
+                    for (_, title), rows in itertools.groupby(
+                        grades, key=lambda grade: (grade['group_key'], grade['group_title'])
+                    )
+                )
+                return db.count_grades_for_export(**filters), sheets
+            
+            self.export_worker = run_export(self, file_path, job, self.language)
+    
+    def format_export_row(self, grade):
+        """قيم صف الدرجة في ملف التصدير"""
+        percentage = grade['percentage']
+        return [
+            grade['class_name'] or '',
+            grade['subject_name'] or '',
+            grade['exam_name'],
+            tr(f"exam_{grade['exam_type']}", self.language),
+            grade['exam_date'] or '',
+            grade['full_name'],
+            grade['student_id'],
+            grade['score'],
+            grade['max_score'],
+            percentage,
+            self.get_grade_letter(percentage) if percentage is not None else '',
+            grade['notes'] or ''
+        ]
     
     def show_statistics(self):
         """عرض إحصائيات الدرجات"""
@@ -719,49 +744,39 @@ class GradesEntryDialog(QDialog):
             tr('max_score', self.language) + f": {exam_data['max_score']}"
         )
         
-        # تحميل الطلاب
-        students = self.db.cursor.execute(
-            """SELECT id, full_name, student_id 
-               FROM students 
-               WHERE class_id = ?
-               ORDER BY full_name""",
-            (self.class_id,)
-        ).fetchall()
+        # تحميل الطلاب مع درجاتهم السابقة في استعلام واحد
+        sheet = self.db.get_exam_grade_sheet(self.class_id, exam_data['id'])
         
-        self.table.setRowCount(len(students))
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(len(sheet))
         
-        for row, student in enumerate(students):
+        for row, record in enumerate(sheet):
             # اسم الطالب
-            self.table.setItem(row, 0, QTableWidgetItem(student[1]))
+            self.table.setItem(row, 0, QTableWidgetItem(record['full_name']))
             self.table.item(row, 0).setFlags(Qt.ItemFlag.ItemIsEnabled)
             
             # رقم الطالب
-            self.table.setItem(row, 1, QTableWidgetItem(student[2]))
+            self.table.setItem(row, 1, QTableWidgetItem(record['student_id']))
             self.table.item(row, 1).setFlags(Qt.ItemFlag.ItemIsEnabled)
             
-            # التحقق من وجود درجة سابقة
-            existing_grade = self.db.cursor.execute(
-                """SELECT score, notes FROM grades 
-                   WHERE student_id = ? AND exam_id = ?""",
-                (student[0], exam_data['id'])
-            ).fetchone()
-            
             # حقل الدرجة
             score_input = QSpinBox()
             score_input.setMinimum(0)
-            score_input.setMaximum(exam_data['max_score'])
-            if existing_grade:
-                score_input.setValue(existing_grade[0])
+            score_input.setMaximum(int(exam_data['max_score']))
+            if record['score'] is not None:
+                score_input.setValue(int(record['score']))
             self.table.setCellWidget(row, 2, score_input)
             
             # حقل الملاحظات
             notes_input = QLineEdit()
-            if existing_grade and existing_grade[1]:
-                notes_input.setText(existing_grade[1])
+            if record['notes']:
+                notes_input.setText(record['notes'])
             self.table.setCellWidget(row, 3, notes_input)
             
             # حفظ معرف الطالب
-            self.table.item(row, 0).setData(Qt.ItemDataRole.UserRole, student[0])
+            self.table.item(row, 0).setData(Qt.ItemDataRole.UserRole, record['id'])
+        
+        self.table.setUpdatesEnabled(True)
     
     def save_grades(self):
         """حفظ الدرجات"""
@@ -774,34 +789,16 @@ class GradesEntryDialog(QDialog):
             return
         
         try:
+            grades = []
             for row in range(self.table.rowCount()):
-                student_id = self.table.item(row, 0).data(Qt.ItemDataRole.UserRole)
-                score_widget = self.table.cellWidget(row, 2)
-                notes_widget = self.table.cellWidget(row, 3)
-                
-                score = score_widget.value()
-                notes = notes_widget.text().strip()
-                
-                # التحقق من وجود درجة سابقة
-                existing = self.db.cursor.execute(
-                    "SELECT id FROM grades WHERE student_id = ? AND exam_id = ?",
-                    (student_id, exam_data['id'])
-                ).fetchone()
-                
-                if existing:
-                    # تحديث الدرجة الموجودة
-                    self.db.cursor.execute(
-                        "UPDATE grades SET score = ?, notes = ? WHERE id = ?",
-                        (score, notes, existing[0])
-                    )
-                else:
-                    # إضافة درجة جديدة
-                    self.db.cursor.execute(
-                        "INSERT INTO grades (student_id, exam_id, score, notes) VALUES (?, ?, ?, ?)",
-                        (student_id, exam_data['id'], score, notes)
-                    )
+                grades.append({
+                    'student_id': self.table.item(row, 0).data(Qt.ItemDataRole.UserRole),
+                    'score': self.table.cellWidget(row, 2).value(),
+                    'notes': self.table.cellWidget(row, 3).text().strip()
+                })
             
-            self.db.connection.commit()
+            # حفظ درجات الامتحان كاملة في عملية واحدة
+            self.db.save_exam_grades(exam_data['id'], grades)
             QMessageBox.information(
                 self, tr('success', self.language),
                 tr('grades_saved_success', self.language)
@@ -895,6 +892,58 @@ class EditGradeDialog(QDialog):
             QMessageBox.critical(self, tr('error', self.language), str(e))
 
 
+class GradesExportDialog(QDialog):
+    """نافذة خيارات تصدير الدرجات"""
+    
+    def __init__(self, language, parent=None):
+        super().__init__(parent)
+        self.language = language
+        self.setup_ui()
+    
+    def setup_ui(self):
+        self.setWindowTitle(tr('export_grades', self.language))
+        self.setFixedWidth(400)
+        
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        
+        # نطاق التصدير
+        self.scope = QComboBox()
+        self.scope.addItem(tr('export_current_filters', self.language), 'current')
+        self.scope.addItem(tr('all_classes', self.language), 'all')
+        form.addRow(tr('export_scope', self.language), self.scope)
+        
+        # تقسيم الأوراق
+        self.group_by = QComboBox()
+        self.group_by.addItem(tr('single_sheet', self.language), None)
+        self.group_by.addItem(tr('sheet_per_subject', self.language), 'subject')
+        self.group_by.addItem(tr('sheet_per_exam', self.language), 'exam')
+        form.addRow(tr('sheets', self.language), self.group_by)
+        
+        layout.addLayout(form)
+        
+        # الأزرار
+        buttons = QHBoxLayout()
+        export_btn = QPushButton(tr('export', self.language))
+        export_btn.setObjectName("successButton")
+        export_btn.clicked.connect(self.accept)
+        cancel_btn = QPushButton(tr('cancel', self.language))
+        cancel_btn.clicked.connect(self.reject)
+        
+        buttons.addWidget(export_btn)
+        buttons.addWidget(cancel_btn)
+        layout.addLayout(buttons)
+        
+        if self.language == 'ar':
+            self.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
+    
+    def get_options(self):
+        return {
+            'scope': self.scope.currentData(),
+            'group_by': self.group_by.currentData()
+        }
+
+
 class StatisticsDialog(QDialog):
     """نافذة عرض الإحصائيات"""
     
@@ -1,24 +1,37 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                            QStackedWidget, QListWidget, QLabel, QPushButton,
                            QFrame, QGridLayout, QSpacerItem, QSizePolicy,
-                           QListWidgetItem, QGraphicsDropShadowEffect)
-from PyQt6.QtCore import Qt, QSize, pyqtSignal, QPropertyAnimation, QEasingCurve
+                           QListWidgetItem, QGraphicsDropShadowEffect,
+                           QMessageBox)
+from PyQt6.QtCore import (Qt, QSize, QTimer, pyqtSignal, QPropertyAnimation,
+                          QEasingCurve)
 from PyQt6.QtGui import QIcon, QColor, QPalette
 from ui.styles import STYLESHEET, get_stat_card_style
-from ui.student_management import StudentManagement
-from ui.teacher_management import TeacherManagement
-from ui.class_management import ClassManagement
-from ui.subject_management import SubjectManagement
-from ui.grades_management import GradesManagement
-from ui.attendance_management import AttendanceManagement
-from ui.timetable_management import TimetableManagement
-from ui.reports_management import ReportsManagement
-from ui.notifications import NotificationsWidget
-from ui.settings import SettingsWidget
-from ai.assistant import AIAssistant
 from database.db_manager import DatabaseManager
+from database.rollups import GRADE_BANDS, term_months
 from utils.translations import tr
+from utils.startup_profile import measure
 import config
+import importlib
+import logging
+
+# صفحات النافذة بترتيب القائمة الجانبية:
+# (المفتاح، اسم الخاصية، الوحدة، الصنف، تمرير بيانات المستخدم)
+# تستورد الوحدة وتنشأ الصفحة عند أول فتح لها (لوحة التحكم فقط تنشأ مباشرة)
+PAGES = [
+    ('dashboard', 'dashboard_widget', None, None, False),
+    ('students', 'student_management', 'ui.student_management', 'StudentManagement', False),
+    ('teachers', 'teacher_management', 'ui.teacher_management', 'TeacherManagement', False),
+    ('classes', 'class_management', 'ui.class_management', 'ClassManagement', False),
+    ('subjects', 'subject_management', 'ui.subject_management', 'SubjectManagement', False),
+    ('grades', 'grades_management', 'ui.grades_management', 'GradesManagement', True),
+    ('attendance', 'attendance_management', 'ui.attendance_management', 'AttendanceManagement', False),
+    ('timetable', 'timetable_management', 'ui.timetable_management', 'TimetableManagement', False),
+    ('reports', 'reports_management', 'ui.reports_management', 'ReportsManagement', False),
+    ('notifications', 'notifications_widget', 'ui.notifications', 'NotificationsWidget', True),
+    ('ai_assistant', 'ai_assistant', 'ai.assistant', 'AIAssistant', True),
+    ('settings', 'settings_widget', 'ui.settings', 'SettingsWidget', True)
+]
 
 class MainWindow(QMainWindow):
     def __init__(self, user_data):
@@ -30,6 +43,14 @@ class MainWindow(QMainWindow):
         self.setStyleSheet(STYLESHEET)
         self.load_dashboard_stats()
         
+        # إنشاء الصفحات المتوقع فتحها في وقت الخمول بعد ظهور النافذة
+        self.prefetch_queue = [
+            index for index, page in enumerate(PAGES)
+            if page[0] in config.PREFETCH_PAGES
+        ]
+        if self.prefetch_queue:
+            QTimer.singleShot(config.PREFETCH_DELAY_MS, self.prefetch_next_page)
+        
     def setup_ui(self):
         self.setWindowTitle(tr("main_window_title", self.current_language))
         self.setGeometry(100, 100, 1400, 800)
@@ -146,8 +167,9 @@ class MainWindow(QMainWindow):
             item.setData(Qt.ItemDataRole.UserRole, index)
             self.menu_list.addItem(item)
         
-        self.menu_list.currentRowChanged.connect(self.change_page)
+        # تحديد الصفحة الأولى قبل ربط الإشارة (الصفحات لم تسجل بعد)
         self.menu_list.setCurrentRow(0)
+        self.menu_list.currentRowChanged.connect(self.change_page)
         
         sidebar_layout.addWidget(self.menu_list)
         
@@ -218,55 +240,52 @@ class MainWindow(QMainWindow):
         titlebar_layout.addLayout(quick_actions)
         
     def setup_pages(self):
-        """إعداد الصفحات"""
-        # لوحة التحكم
-        self.dashboard_widget = self.create_dashboard()
+        """إعداد الصفحات: لوحة التحكم فوراً وعنصر مؤقت لكل صفحة أخرى"""
+        with measure('page', 'dashboard'):
+            self.dashboard_widget = self.create_dashboard()
         self.stacked_widget.addWidget(self.dashboard_widget)
+        self.created_pages = {0}
+        self.prefetch_queue = []
         
-        # إدارة الطلاب
-        self.student_management = StudentManagement(self.current_language)
-        self.stacked_widget.addWidget(self.student_management)
-        
-        # إدارة المعلمين
-        self.teacher_management = TeacherManagement(self.current_language)
-        self.stacked_widget.addWidget(self.teacher_management)
-        # ... تكملة من الكود السابق
-        
-        # إدارة الصفوف
-        self.class_management = ClassManagement(self.current_language)
-        self.stacked_widget.addWidget(self.class_management)
-        
-        # إدارة المواد
-        self.subject_management = SubjectManagement(self.current_language)
-        self.stacked_widget.addWidget(self.subject_management)
-        
-        # إدارة الدرجات
-        self.grades_management = GradesManagement(self.current_language, self.user_data)
-        self.stacked_widget.addWidget(self.grades_management)
-        
-        # إدارة الحضور
-        self.attendance_management = AttendanceManagement(self.current_language)
-        self.stacked_widget.addWidget(self.attendance_management)
-        
-        # إدارة الجدول الدراسي
-        self.timetable_management = TimetableManagement(self.current_language)
-        self.stacked_widget.addWidget(self.timetable_management)
-        
-        # التقارير
-        self.reports_management = ReportsManagement(self.current_language)
-        self.stacked_widget.addWidget(self.reports_management)
-        
-        # الإشعارات
-        self.notifications_widget = NotificationsWidget(self.current_language, self.user_data)
-        self.stacked_widget.addWidget(self.notifications_widget)
-        
-        # مساعد الذكاء الاصطناعي
-        self.ai_assistant = AIAssistant(self.current_language, self.user_data)
-        self.stacked_widget.addWidget(self.ai_assistant)
-        
-        # الإعدادات
-        self.settings_widget = SettingsWidget(self.current_language, self.user_data)
-        self.stacked_widget.addWidget(self.settings_widget)
+        for key, attribute, module, class_name, with_user in PAGES[1:]:
+            setattr(self, attribute, None)
+            self.stacked_widget.addWidget(QWidget())
+    
+    def ensure_page(self, index):
+        """إنشاء الصفحة عند أول طلب لها، وإرجاع True إذا كانت جاهزة"""
+        if index in self.created_pages:
+            return True
+        
+        key, attribute, module, class_name, with_user = PAGES[index]
+        try:
+            page_class = getattr(importlib.import_module(module), class_name)
+            with measure('page', key):
+                if with_user:
+                    page = page_class(self.current_language, self.user_data)
+                else:
+                    page = page_class(self.current_language)
+        except Exception as e:
+            logging.error(f"فشل في إنشاء الصفحة {key}: {str(e)}")
+            return False
+        
+        # استبدال العنصر المؤقت بالصفحة في الموضع نفسه
+        placeholder = self.stacked_widget.widget(index)
+        self.stacked_widget.insertWidget(index, page)
+        self.stacked_widget.removeWidget(placeholder)
+        placeholder.deleteLater()
+        
+        setattr(self, attribute, page)
+        self.created_pages.add(index)
+        return True
+    
+    def prefetch_next_page(self):
+        """إنشاء صفحة واحدة من قائمة التحميل المسبق ثم جدولة التالية"""
+        if not self.prefetch_queue:
+            return
+        self.ensure_page(self.prefetch_queue.pop(0))
+        if self.prefetch_queue:
+            # صفحة واحدة في كل دورة أحداث حتى تبقى الواجهة مستجيبة
+            QTimer.singleShot(0, self.prefetch_next_page)
     
     def create_dashboard(self):
         """إنشاء لوحة التحكم"""
@@ -417,59 +436,40 @@ class MainWindow(QMainWindow):
         """)
         layout.addWidget(title)
         
-        # قائمة الأنشطة
-        activities = [
-            "✅ تم إضافة 5 طلاب جدد",
-            "📊 تم رفع درجات الرياضيات للصف الثالث",
-            "📅 تم تحديث الجدول الدراسي",
-            "🔔 رسالة جديدة من المدير"
-        ]
-        
-        for activity in activities:
-            activity_label = QLabel(activity)
-            activity_label.setStyleSheet("""
-                padding: 8px;
-                color: #7F8C8D;
-                border-bottom: 1px solid #ECF0F1;
-            """)
-            layout.addWidget(activity_label)
+        # قائمة الأنشطة (تملأ من سجل الأنشطة في load_recent_activity)
+        self.activity_layout = QVBoxLayout()
+        layout.addLayout(self.activity_layout)
         
         layout.addStretch()
         return card
     
     def create_attendance_chart(self):
-        """إنشاء مخطط الحضور الأسبوعي"""
+        """إنشاء مخطط الحضور اليومي (يملأ في load_attendance_chart)"""
         from PyQt6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis, QCategoryAxis
         from PyQt6.QtGui import QPainter
         
         chart = QChart()
         chart.setTitle(tr("weekly_attendance", self.current_language))
         chart.setAnimationOptions(QChart.AnimationOption.SeriesAnimations)
+        chart.legend().hide()
         
-        # بيانات تجريبية
-        series = QLineSeries()
-        series.append(0, 92)
-        series.append(1, 95)
-        series.append(2, 88)
-        series.append(3, 93)
-        series.append(4, 90)
-        
-        chart.addSeries(series)
+        self.attendance_series = QLineSeries()
+        chart.addSeries(self.attendance_series)
         
         # المحاور
-        axis_x = QCategoryAxis()
-        days = ["الأحد", "الإثنين", "الثلاثاء", "الأربعاء", "الخميس"]
-        for i, day in enumerate(days):
-            axis_x.append(day, i)
+        self.attendance_axis_x = QCategoryAxis()
+        self.attendance_axis_x.setLabelsPosition(
+            QCategoryAxis.AxisLabelsPosition.AxisLabelsPositionOnValue
+        )
         
         axis_y = QValueAxis()
         axis_y.setRange(0, 100)
         axis_y.setLabelFormat("%d%")
         
-        chart.addAxis(axis_x, Qt.AlignmentFlag.AlignBottom)
+        chart.addAxis(self.attendance_axis_x, Qt.AlignmentFlag.AlignBottom)
         chart.addAxis(axis_y, Qt.AlignmentFlag.AlignLeft)
-        series.attachAxis(axis_x)
-        series.attachAxis(axis_y)
+        self.attendance_series.attachAxis(self.attendance_axis_x)
+        self.attendance_series.attachAxis(axis_y)
         
         # تخصيص المظهر
         chart.setBackgroundBrush(Qt.GlobalColor.transparent)
@@ -492,7 +492,7 @@ class MainWindow(QMainWindow):
         return chart_view
     
     def create_grades_chart(self):
-        """إنشاء مخطط توزيع الدرجات"""
+        """إنشاء مخطط توزيع الدرجات للفصل الحالي (يملأ في load_grades_chart)"""
         from PyQt6.QtCharts import QChart, QChartView, QPieSeries
         from PyQt6.QtGui import QPainter
         
@@ -500,27 +500,9 @@ class MainWindow(QMainWindow):
         chart.setTitle(tr("grades_distribution", self.current_language))
         chart.setAnimationOptions(QChart.AnimationOption.SeriesAnimations)
         
-        # بيانات تجريبية
-        series = QPieSeries()
-        series.append("ممتاز", 45)
-        series.append("جيد جداً", 30)
-        series.append("جيد", 15)
-        series.append("مقبول", 10)
-        
-        # تخصيص الألوان
-        colors = [
-            QColor(config.COLORS['success']),
-            QColor(config.COLORS['info']),
-            QColor(config.COLORS['warning']),
-            QColor(config.COLORS['danger'])
-        ]
+        self.grades_series = QPieSeries()
         
-        for i, slice in enumerate(series.slices()):
-            slice.setLabelVisible(True)
-            slice.setPen(QColor(Qt.GlobalColor.white))
-            slice.setBrush(colors[i])
-        
-        chart.addSeries(series)
+        chart.addSeries(self.grades_series)
         chart.setBackgroundBrush(Qt.GlobalColor.transparent)
         
         chart_view = QChartView(chart)
@@ -550,6 +532,75 @@ class MainWindow(QMainWindow):
         self.update_stat_card(self.classes_card, str(stats['total_classes']))
         self.update_stat_card(self.subjects_card, str(stats['total_subjects']))
         self.update_stat_card(self.attendance_card, f"{stats['attendance_rate']:.1f}%")
+        
+        self.load_attendance_chart()
+        self.load_grades_chart()
+        self.load_recent_activity()
+    
+    def load_attendance_chart(self):
+        """تحميل نسب الحضور اليومية من جدول التجميع"""
+        trend = self.db.get_attendance_trend(config.DASHBOARD_ATTENDANCE_DAYS)
+        
+        self.attendance_series.clear()
+        for label in self.attendance_axis_x.categoriesLabels():
+            self.attendance_axis_x.remove(label)
+        
+        for index, row in enumerate(trend):
+            self.attendance_series.append(index, row['rate'])
+            # التاريخ بصيغة MM-DD
+            self.attendance_axis_x.append(row['date'][5:], index)
+        self.attendance_axis_x.setRange(0, max(len(trend) - 1, 1))
+    
+    def load_grades_chart(self):
+        """تحميل توزيع فئات التقدير للفصل الحالي من جدول التجميع"""
+        from PyQt6.QtCharts import QPieSlice
+        
+        bands = self.db.get_grade_bands(*term_months())
+        colors = {
+            'excellent': config.COLORS['success'],
+            'very_good': config.COLORS['info'],
+            'good': config.COLORS['secondary'],
+            'pass': config.COLORS['warning'],
+            'fail': config.COLORS['danger']
+        }
+        
+        self.grades_series.clear()
+        for band, minimum in GRADE_BANDS:
+            count = bands.get(band, 0)
+            if not count:
+                continue
+            slice = QPieSlice(f"{tr(f'band_{band}', self.current_language)} ({count})", count)
+            slice.setLabelVisible(True)
+            slice.setPen(QColor(Qt.GlobalColor.white))
+            slice.setBrush(QColor(colors[band]))
+            self.grades_series.append(slice)
+    
+    def load_recent_activity(self):
+        """تحميل آخر الأنشطة من سجل الأنشطة"""
+        while self.activity_layout.count():
+            item = self.activity_layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+        
+        activities = self.db.get_recent_activity(5)
+        if not activities:
+            activities = [None]
+        
+        for activity in activities:
+            if activity is None:
+                text = tr('no_recent_activity', self.current_language)
+            else:
+                text = tr(f"activity_{activity['action']}", self.current_language).format(
+                    count=activity['count'],
+                    name=activity['name'] or ''
+                )
+            activity_label = QLabel(text)
+            activity_label.setStyleSheet("""
+                padding: 8px;
+                color: #7F8C8D;
+                border-bottom: 1px solid #ECF0F1;
+            """)
+            self.activity_layout.addWidget(activity_label)
     
     def update_stat_card(self, card, value):
         """تحديث قيمة البطاقة الإحصائية"""
@@ -558,21 +609,28 @@ class MainWindow(QMainWindow):
             value_label.setText(value)
     
     def change_page(self, index):
-        """تغيير الصفحة الحالية"""
+        """تغيير الصفحة الحالية (تنشأ الصفحة عند أول فتح)"""
+        if index < 0 or index >= len(PAGES):
+            return
+        
+        if index in self.prefetch_queue:
+            self.prefetch_queue.remove(index)
+        
+        if not self.ensure_page(index):
+            QMessageBox.critical(
+                self,
+                tr('error', self.current_language),
+                tr('page_unavailable', self.current_language)
+            )
+            return
+        
         self.stacked_widget.setCurrentIndex(index)
         
         # تحديث عنوان الصفحة
-        menu_items = [
-            "dashboard", "students", "teachers", "classes", 
-            "subjects", "grades", "attendance", "timetable",
-            "reports", "notifications", "ai_assistant", "settings"
-        ]
+        self.page_title.setText(tr(PAGES[index][0], self.current_language))
         
-        if index < len(menu_items):
-            self.page_title.setText(tr(menu_items[index], self.current_language))
-            
-            # تأثير الانتقال
-            self.animate_page_change()
+        # تأثير الانتقال
+        self.animate_page_change()
     
     def animate_page_change(self):
         """تأثير حركة عند تغيير الصفحة"""
@@ -1,14 +1,136 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-                           QTableWidget, QTableWidgetItem, QLineEdit, QComboBox,
+                           QTableView, QLineEdit, QComboBox,
                            QDialog, QFormLayout, QDateEdit, QMessageBox,
                            QHeaderView, QAbstractItemView, QLabel, QSpinBox)
-from PyQt6.QtCore import Qt, QDate, pyqtSignal
+from PyQt6.QtCore import (Qt, QDate, QTimer, pyqtSignal, QAbstractTableModel,
+                          QModelIndex)
 from PyQt6.QtGui import QIcon
 from database.db_manager import DatabaseManager
 from utils.translations import tr
+from utils.export import run_export
 from ui.styles import STYLESHEET
+import config
 import datetime
 
+class StudentTableModel(QAbstractTableModel):
+    """
+    نموذج قائمة الطلاب: يجلب الصفوف من قاعدة البيانات صفحة بصفحة
+    عند التمرير (ترقيم المفاتيح)، والترتيب يتم في استعلام SQL
+    """
+    
+    PAGE_SIZE = 200
+    
+    # (مفتاح العمود في الاستعلام، مفتاح الترجمة للعنوان)
+    COLUMNS = [
+        ('student_id', 'student_id'),
+        ('full_name', 'full_name'),
+        ('date_of_birth', 'date_of_birth'),
+        ('gender', 'gender'),
+        ('class_name', 'class'),
+        ('phone', 'phone'),
+        ('parent_phone', 'parent_phone'),
+        ('address', 'address'),
+        ('enrollment_date', 'enrollment_date')
+    ]
+    
+    def __init__(self, db, language='ar', parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.language = language
+        self.sort_column = 'full_name'
+        self.descending = False
+        self.filters = {}
+        self.total = 0
+        self._rows = []
+        self._exhausted = True
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        student = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display_value(student, self.COLUMNS[index.column()][0])
+        if role == Qt.ItemDataRole.UserRole:
+            return student['id']
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal
+                and role == Qt.ItemDataRole.DisplayRole):
+            return tr(self.COLUMNS[section][1], self.language)
+        return super().headerData(section, orientation, role)
+    
+    def display_value(self, student, key):
+        """النص المعروض لقيمة عمود"""
+        value = student[key]
+        if key == 'gender':
+            return tr(f"gender_{value}", self.language) if value else ''
+        return '' if value is None else str(value)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+    
+    def fetchMore(self, parent=QModelIndex()):
+        """جلب الصفحة التالية بعد آخر صف محمل"""
+        if parent.isValid() or self._exhausted:
+            return
+        after = None
+        if self._rows:
+            last = self._rows[-1]
+            after = (last['sort_key'], last['id'])
+        
+        rows = self.db.get_students_page(
+            self.sort_column, self.descending, after, self.PAGE_SIZE,
+            **self.filters
+        )
+        self._exhausted = len(rows) < self.PAGE_SIZE
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+    
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """الترتيب في قاعدة البيانات ثم إعادة التحميل من الصفحة الأولى"""
+        sort_column = self.COLUMNS[column][0]
+        descending = order == Qt.SortOrder.DescendingOrder
+        if (sort_column, descending) == (self.sort_column, self.descending):
+            return
+        self.sort_column = sort_column
+        self.descending = descending
+        self.reload()
+    
+    def set_filters(self, **filters):
+        """تطبيق شروط التصفية وإعادة التحميل"""
+        self.filters = {
+            key: value for key, value in filters.items()
+            if value is not None and value != ''
+        }
+        self.reload()
+    
+    def reload(self):
+        """إعادة التحميل من الصفحة الأولى"""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.total = self.db.count_students(**self.filters)
+        self.endResetModel()
+        self.fetchMore()
+    
+    def student_id_at(self, row):
+        """معرف الطالب في الصف المحدد"""
+        return self._rows[row]['id']
+    
+    def format_row(self, student):
+        """قيم صف الطالب كنصوص العرض (للتصدير)"""
+        return [self.display_value(student, key) for key, _ in self.COLUMNS]
+
 class StudentManagement(QWidget):
     def __init__(self, language='ar'):
         super().__init__()
@@ -30,13 +152,33 @@ class StudentManagement(QWidget):
         self.add_button.clicked.connect(self.show_add_dialog)
         toolbar_layout.addWidget(self.add_button)
         
+        # أزرار الإجراءات على الطالب المحدد
+        edit_button = QPushButton(f"✏️ {tr('edit', self.language)}")
+        edit_button.clicked.connect(lambda: self.run_on_selected(self.edit_student))
+        toolbar_layout.addWidget(edit_button)
+        
+        delete_button = QPushButton(f"🗑️ {tr('delete', self.language)}")
+        delete_button.setObjectName("dangerButton")
+        delete_button.clicked.connect(lambda: self.run_on_selected(self.delete_student))
+        toolbar_layout.addWidget(delete_button)
+        
+        view_button = QPushButton(f"👁️ {tr('view_details', self.language)}")
+        view_button.clicked.connect(lambda: self.run_on_selected(self.view_student_details))
+        toolbar_layout.addWidget(view_button)
+        
         # مربع البحث
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText(tr('search_students', self.language))
-        self.search_input.textChanged.connect(self.search_students)
         self.search_input.setMaximumWidth(300)
         toolbar_layout.addWidget(self.search_input)
         
+        # تأجيل البحث حتى يتوقف المستخدم عن الكتابة
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(config.SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.search_students)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        
         # فلتر الصف
         self.class_filter = QComboBox()
         self.class_filter.addItem(tr('all_classes', self.language), None)
@@ -59,8 +201,10 @@ class StudentManagement(QWidget):
         
         layout.addLayout(toolbar_layout)
         
-        # جدول الطلاب
-        self.table = QTableWidget()
+        # جدول الطلاب (يحمل الصفحات عند التمرير)
+        self.model = StudentTableModel(self.db, self.language, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
         self.setup_table()
         layout.addWidget(self.table)
         
@@ -77,27 +221,18 @@ class StudentManagement(QWidget):
     
     def setup_table(self):
         """إعداد جدول الطلاب"""
-        headers = [
-            tr('student_id', self.language),
-            tr('full_name', self.language),
-            tr('date_of_birth', self.language),
-            tr('gender', self.language),
-            tr('class', self.language),
-            tr('phone', self.language),
-            tr('parent_phone', self.language),
-            tr('address', self.language),
-            tr('enrollment_date', self.language),
-            tr('actions', self.language)
-        ]
-        
-        self.table.setColumnCount(len(headers))
-        self.table.setHorizontalHeaderLabels(headers)
-        
         # تخصيص الجدول
         self.table.setAlternatingRowColors(True)
         self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setDefaultSectionSize(32)
+        self.table.horizontalHeader().setSortIndicator(1, Qt.SortOrder.AscendingOrder)
         self.table.setSortingEnabled(True)
+        self.table.doubleClicked.connect(
+            lambda index: self.edit_student(self.model.student_id_at(index.row()))
+        )
         
         # تحديد عرض الأعمدة
         self.table.setColumnWidth(0, 100)  # رقم الطالب
@@ -109,66 +244,23 @@ class StudentManagement(QWidget):
         self.table.setColumnWidth(6, 120)  # هاتف ولي الأمر
         self.table.setColumnWidth(7, 200)  # العنوان
         self.table.setColumnWidth(8, 120)  # تاريخ التسجيل
-        self.table.setColumnWidth(9, 150)  # الإجراءات
     
     def load_students(self):
-        """تحميل بيانات الطلاب"""
-        self.table.setRowCount(0)
-        students = self.db.get_all_students()
-        
-        for student in students:
-            self.add_student_to_table(student)
-        
+        """تحميل بيانات الطلاب (الصفحة الأولى فقط)"""
+        self.model.reload()
         self.update_info_label()
     
-    def add_student_to_table(self, student):
-        """إضافة طالب إلى الجدول"""
-        row_position = self.table.rowCount()
-        self.table.insertRow(row_position)
-        
-        # إضافة البيانات
-        self.table.setItem(row_position, 0, QTableWidgetItem(str(student['student_id'])))
-        self.table.setItem(row_position, 1, QTableWidgetItem(student['full_name']))
-        self.table.setItem(row_position, 2, QTableWidgetItem(str(student['date_of_birth'] or '')))
-        
-        # ترجمة الجنس
-        gender_text = tr(f"gender_{student['gender']}", self.language) if student['gender'] else ''
-        self.table.setItem(row_position, 3, QTableWidgetItem(gender_text))
-        
-        self.table.setItem(row_position, 4, QTableWidgetItem(student['class_name'] or ''))
-        self.table.setItem(row_position, 5, QTableWidgetItem(student['phone'] or ''))
-        self.table.setItem(row_position, 6, QTableWidgetItem(student['parent_phone'] or ''))
-        self.table.setItem(row_position, 7, QTableWidgetItem(student['address'] or ''))
-        self.table.setItem(row_position, 8, QTableWidgetItem(str(student['enrollment_date'] or '')))
-        
-        # أزرار الإجراءات
-        actions_widget = QWidget()
-        actions_layout = QHBoxLayout(actions_widget)
-        actions_layout.setContentsMargins(5, 0, 5, 0)
-        
-        # زر التعديل
-        edit_button = QPushButton("✏️")
-        edit_button.setToolTip(tr('edit', self.language))
-        edit_button.setFixedSize(30, 30)
-        edit_button.clicked.connect(lambda: self.edit_student(student['id']))
-        actions_layout.addWidget(edit_button)
-        
-        # زر الحذف
-        delete_button = QPushButton("🗑️")
-        delete_button.setToolTip(tr('delete', self.language))
-        delete_button.setFixedSize(30, 30)
-        delete_button.setObjectName("dangerButton")
-        delete_button.clicked.connect(lambda: self.delete_student(student['id']))
-        actions_layout.addWidget(delete_button)
-        
-        # زر عرض التفاصيل
-        view_button = QPushButton("👁️")
-        view_button.setToolTip(tr('view_details', self.language))
-        view_button.setFixedSize(30, 30)
-        view_button.clicked.connect(lambda: self.view_student_details(student['id']))
-        actions_layout.addWidget(view_button)
-        
-        self.table.setCellWidget(row_position, 9, actions_widget)
+    def run_on_selected(self, action):
+        """تنفيذ إجراء على الطالب المحدد في الجدول"""
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            QMessageBox.warning(
+                self,
+                tr('warning', self.language),
+                tr('select_student_first', self.language)
+            )
+            return
+        action(self.model.student_id_at(rows[0].row()))
     
     def show_add_dialog(self):
         """عرض نافذة إضافة طالب جديد"""
@@ -193,8 +285,7 @@ class StudentManagement(QWidget):
     def edit_student(self, student_id):
         """تعديل بيانات طالب"""
         # الحصول على بيانات الطالب
-        students = self.db.get_all_students()
-        student = next((s for s in students if s['id'] == student_id), None)
+        student = self.db.get_student(student_id)
         
         if student:
             dialog = StudentDialog(self.language, student, self)
@@ -250,32 +341,22 @@ class StudentManagement(QWidget):
         # يمكن إضافة نافذة لعرض تفاصيل إضافية
         pass
     
-    def search_students(self, text):
-        """البحث عن الطلاب"""
-        for row in range(self.table.rowCount()):
-            match = False
-            for col in range(self.table.columnCount() - 1):  # استثناء عمود الإجراءات
-                item = self.table.item(row, col)
-                if item and text.lower() in item.text().lower():
-                    match = True
-                    break
-            self.table.setRowHidden(row, not match)
+    def apply_filters(self):
+        """إعادة الاستعلام بالبحث والصف المحددين معاً"""
+        self.model.set_filters(
+            search=self.search_input.text().strip(),
+            class_id=self.class_filter.currentData()
+        )
+        self.update_info_label()
+    
+    def search_students(self):
+        """البحث عن الطلاب (فهرس البحث النصي، يشمل الصفوف غير المحملة)"""
+        self.apply_filters()
     
     def filter_by_class(self):
-        """تصفية الطلاب حسب الصف"""
-        class_id = self.class_filter.currentData()
-        
-        for row in range(self.table.rowCount()):
-            if class_id is None:
-                self.table.setRowHidden(row, False)
-            else:
-                class_item = self.table.item(row, 4)
-                if class_item:
-                  # ... تكملة من الكود السابق
-                    # هنا يمكن تحسين المنطق للمقارنة بناءً على معرف الصف
-                    self.table.setRowHidden(row, False)
-                else:
-                    self.table.setRowHidden(row, True)
+        """تصفية الطلاب حسب الصف (استعلام على فهرس class_id)"""
+        self.search_timer.stop()
+        self.apply_filters()
     
     def load_classes_filter(self):
         """تحميل الصفوف في قائمة التصفية"""
@@ -288,14 +369,22 @@ class StudentManagement(QWidget):
     
     def refresh_table(self):
         """تحديث الجدول"""
-        self.load_students()
+        # مسح التصفية دون إعادة التحميل مع كل تغيير
+        for widget in (self.search_input, self.class_filter):
+            widget.blockSignals(True)
         self.search_input.clear()
+        self.search_timer.stop()
         self.class_filter.setCurrentIndex(0)
+        for widget in (self.search_input, self.class_filter):
+            widget.blockSignals(False)
+        
+        self.model.set_filters()
+        self.update_info_label()
     
     def update_info_label(self):
         """تحديث شريط المعلومات"""
-        total = self.table.rowCount()
-        visible = sum(1 for row in range(total) if not self.table.isRowHidden(row))
+        total = self.db.count_students()
+        visible = self.model.total
         
         info_text = tr('showing_students', self.language).format(
             visible=visible, total=total
@@ -305,7 +394,6 @@ class StudentManagement(QWidget):
     def export_students(self):
         """تصدير بيانات الطلاب"""
         from PyQt6.QtWidgets import QFileDialog
-        import pandas as pd
         
         file_path, _ = QFileDialog.getSaveFileName(
             self,
@@ -315,43 +403,23 @@ class StudentManagement(QWidget):
         )
         
         if file_path:
-            try:
-                # جمع البيانات من الجدول
-                data = []
-                headers = []
-                
-                # الحصول على رؤوس الأعمدة
-                for col in range(self.table.columnCount() - 1):  # استثناء عمود الإجراءات
-                    headers.append(self.table.horizontalHeaderItem(col).text())
-                
-                # الحصول على البيانات
-                for row in range(self.table.rowCount()):
-                    if not self.table.isRowHidden(row):
-                        row_data = []
-                        for col in range(self.table.columnCount() - 1):
-                            item = self.table.item(row, col)
-                            row_data.append(item.text() if item else '')
-                        data.append(row_data)
-                
-                # إنشاء DataFrame وحفظه
-                df = pd.DataFrame(data, columns=headers)
-                
-                if file_path.endswith('.xlsx'):
-                    df.to_excel(file_path, index=False)
-                else:
-                    df.to_csv(file_path, index=False, encoding='utf-8-sig')
-                
-                QMessageBox.information(
-                    self,
-                    tr('success', self.language),
-                    tr('export_success', self.language)
-                )
-            except Exception as e:
-                QMessageBox.critical(
-                    self,
-                    tr('error', self.language),
-                    str(e)
-                )
+            # نسخة من الترتيب والتصفية الحاليين لاستخدامها في خيط التصدير
+            model = self.model
+            sort_column, descending = model.sort_column, model.descending
+            filters = dict(model.filters)
+            headers = [
+                model.headerData(col, Qt.Orientation.Horizontal)
+                for col in range(model.columnCount())
+            ]
+            
+            def job(db):
+                students = db.iter_students(sort_column, descending, **filters)
+                rows = (model.format_row(student) for student in students)
+                return db.count_students(**filters), [
+                    (tr('students', self.language), headers, rows)
+                ]
+            
+            self.export_worker = run_export(self, file_path, job, self.language)
 
 
 class StudentDialog(QDialog):
@@ -498,8 +566,7 @@ class StudentDialog(QDialog):
         
         # التحقق من تكرار رقم الطالب
         if not self.student_data:  # فقط عند الإضافة
-            students = self.db.get_all_students()
-            if any(s['student_id'] == data['student_id'] for s in students):
+            if self.db.student_code_exists(data['student_id']):
                 QMessageBox.warning(
                     self,
                     tr('warning', self.language),
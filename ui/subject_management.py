@@ -135,23 +135,7 @@ class SubjectManagement(QWidget):
         """تحميل بيانات المواد"""
         try:
             # جلب بيانات المواد مع معلومات إضافية
-            subjects_data = self.db.cursor.execute("""
-                SELECT 
-                    s.id,
-                    s.subject_name,
-                    s.subject_code,
-                    s.credit_hours,
-                    s.subject_type,
-                    GROUP_CONCAT(t.full_name, ', ') as teachers,
-                    COUNT(DISTINCT tt.class_id) as classes_count,
-                    s.status
-                FROM subjects s
-                LEFT JOIN teacher_subjects ts ON s.id = ts.subject_id
-                LEFT JOIN teachers t ON ts.teacher_id = t.id
-                LEFT JOIN timetable tt ON s.id = tt.subject_id
-                GROUP BY s.id, s.subject_name, s.subject_code, s.credit_hours, s.subject_type, s.status
-                ORDER BY s.subject_name
-            """).fetchall()
+            subjects_data = self.db.get_subjects_overview()
             
             # تحديث الجدول
             self.table.setRowCount(len(subjects_data))
@@ -5,9 +5,10 @@ from PyQt6.QtWidgets import (
     QHeaderView, QAbstractItemView, QLabel, QListWidget, QListWidgetItem,
     QDialogButtonBox, QComboBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from database.db_manager import DatabaseManager
 from utils.translations import tr
+import config
 import hashlib
 
 
@@ -36,10 +37,16 @@ class TeacherManagement(QWidget):
 
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText(tr("search_teachers", self.language))
-        self.search_input.textChanged.connect(self.search_teachers)
         self.search_input.setMaximumWidth(300)
         tb.addWidget(self.search_input)
 
+        # تأجيل البحث حتى يتوقف المستخدم عن الكتابة
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(config.SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.search_teachers)
+        self.search_input.textChanged.connect(self.search_timer.start)
+
         tb.addStretch()
 
         refresh_btn = QPushButton("🔄")
@@ -85,25 +92,22 @@ class TeacherManagement(QWidget):
 
     # ---------- Data ----------
     def load_teachers(self):
+        # المعلمون مع موادهم المسندة في استعلام واحد
+        self.teachers = self.db.get_teachers_with_subjects()
+        self.search_teachers()
+
+    def show_teachers(self, teachers):
         self.table.setRowCount(0)
-        self.teachers = self.db.get_all_teachers()
-        for t in self.teachers:
+        self.table.setUpdatesEnabled(False)
+        for t in teachers:
             self.add_teacher_row(t)
+        self.table.setUpdatesEnabled(True)
         self.update_info_label()
 
     def add_teacher_row(self, t):
         row = self.table.rowCount()
         self.table.insertRow(row)
 
-        # استرجاع المواد المسندة
-        subjects = ", ".join(
-            s["subject_name"] for s in self.db.get_all_subjects()
-            if self.db.cursor.execute(
-                "SELECT 1 FROM teacher_subjects WHERE teacher_id = ? AND subject_id = ?",
-                (t["id"], s["id"])
-            ).fetchone()
-        )
-
         data = [
             t["teacher_id"],
             t["full_name"],
@@ -112,7 +116,7 @@ class TeacherManagement(QWidget):
             t.get("phone", ""),
             t.get("specialization", ""),
             t.get("hire_date", ""),
-            subjects,
+            t["subjects"] or "",
         ]
         for col, val in enumerate(data):
             self.table.setItem(row, col, QTableWidgetItem(str(val)))
@@ -197,21 +201,26 @@ class TeacherManagement(QWidget):
         self.refresh_table()
 
     # ---------- Helpers ----------
-    def search_teachers(self, text):
-        for row in range(self.table.rowCount()):
-            visible = any(
-                text.lower() in (self.table.item(row, c).text().lower() if self.table.item(row, c) else "")
-                for c in range(self.table.columnCount() - 1)
-            )
-            self.table.setRowHidden(row, not visible)
+    def search_teachers(self):
+        text = self.search_input.text().strip()
+        if not text:
+            self.show_teachers(self.teachers)
+            return
+        # النتائج مرتبة حسب الصلة من فهرس البحث النصي
+        by_id = {t["id"]: t for t in self.teachers}
+        ids = self.db.search("teachers", text, limit=len(by_id))
+        self.show_teachers([by_id[i] for i in ids if i in by_id])
 
     def refresh_table(self):
-        self.load_teachers()
+        self.search_input.blockSignals(True)
         self.search_input.clear()
+        self.search_input.blockSignals(False)
+        self.search_timer.stop()
+        self.load_teachers()
 
     def update_info_label(self):
-        total = self.table.rowCount()
-        visible = sum(1 for r in range(total) if not self.table.isRowHidden(r))
+        total = len(self.teachers)
+        visible = self.table.rowCount()
         self.info_lbl.setText(tr("showing_teachers", self.language).format(
             visible=visible, total=total))
 
@@ -1,20 +1,31 @@
 """
 نظام النسخ الاحتياطي واستعادة البيانات
 يدعم النسخ التلقائي والاستعادة الآمنة
+
+التحقق من جميع النسخ الاحتياطية (أو نسخ آخر عدد من الأيام):
+    python -m utils.backup_restore --verify-all [--days 31]
 """
 
 import sqlite3
+import collections
 import json
 import datetime
 import os
+import sys
 import shutil
+import tempfile
 import zipfile
 import schedule
 import threading
 import time
 from PyQt6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
 from PyQt6.QtCore import QThread, pyqtSignal
+from database.connection_pool import connect
 from database.db_manager import DatabaseManager
+from utils.backup_store import BackupStore, quick_check, sha256_hex
+from concurrent.futures import ThreadPoolExecutor
+from utils.compression import CODECS, zip_options
+import config
 from utils.translations import tr
 import logging
 
@@ -28,163 +39,334 @@ logging.basicConfig(
     ]
 )
 
+# حجم الدفعة عند بث البيانات من وإلى الأرشيف
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def backup_database(source_path, target_path, progress=None):
+    """
+    نسخ قاعدة بيانات حية بواجهة النسخ الاحتياطي في SQLite على دفعات من الصفحات
+    مع توقف قصير بين الدفعات حتى لا يتعطل المستخدمون الآخرون
+    progress: دالة تستقبل (عدد الصفحات المنسوخة، إجمالي الصفحات)
+    """
+    source = connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        if wal:
+            # معاملة قراءة طوال النسخ: لقطة متسقة لا تعيد الكتابة الجارية
+            # بدء النسخ من جديد، ولا تمنع الكتابة في وضع WAL
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+        def on_step(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+            time.sleep(config.BACKUP_STEP_SLEEP)
+
+        source.backup(target, pages=config.BACKUP_STEP_PAGES, progress=on_step)
+
+        if wal:
+            source.rollback()
+    finally:
+        target.close()
+        source.close()
+
+
+def copy_stream(source, target, total=None, progress=None, close_target=True,
+                digests=None):
+    """
+    نقل البيانات بين ملفين مفتوحين (أو مدخل أرشيف) على دفعات دون تحميلها كاملة
+    في الذاكرة، ويغلق المصدر وكذلك الهدف إذا كان close_target
+    digests: قائمة تضاف إليها بصمة SHA-256 لكل دفعة
+    """
+    copied = 0
+    try:
+        while True:
+            chunk = source.read(STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            target.write(chunk)
+            if digests is not None:
+                digests.append(sha256_hex(chunk))
+            copied += len(chunk)
+            if progress and total:
+                progress(copied, total)
+    finally:
+        source.close()
+        if close_target:
+            target.close()
+    return copied
+
+
+def verify_archive_database(zipf, backup_info, temp_dir=None):
+    """
+    بث قاعدة البيانات من الأرشيف إلى ملف مؤقت مع حساب بصمات دفعاتها على خيوط
+    متوازية ومقارنتها بالمسجلة في backup_info.json، ثم PRAGMA quick_check
+    عليها، ويرجع (سليمة، رسالة)
+    (الأرشيفات القديمة دون بصمات يكتفى فيها بفحص CRC الذي يجريه zipfile)
+    """
+    expected = backup_info.get('database_sha256')
+    chunk_size = backup_info.get('database_chunk_size', STREAM_CHUNK_SIZE)
+    workers = config.BACKUP_VERIFY_WORKERS
+    
+    handle, database_copy = tempfile.mkstemp(suffix='.db', dir=temp_dir)
+    try:
+        digests = []
+        with os.fdopen(handle, 'wb') as target, zipf.open('database.db') as source, \
+                ThreadPoolExecutor(workers) as pool:
+            pending = collections.deque()
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                target.write(chunk)
+                pending.append(pool.submit(sha256_hex, chunk))
+                # عدد محدود من الدفعات في الذاكرة بانتظار الحساب
+                if len(pending) > 2 * workers:
+                    digests.append(pending.popleft().result())
+            digests.extend(future.result() for future in pending)
+        
+        if expected is not None and digests != expected:
+            mismatched = sum(a != b for a, b in zip(digests, expected))
+            mismatched += abs(len(digests) - len(expected))
+            return False, f"بصمات {mismatched} دفعة من قاعدة البيانات غير مطابقة"
+        
+        ok, messages = quick_check(database_copy)
+        if not ok:
+            return False, f"فشل فحص سلامة قاعدة البيانات المستعادة: {messages[0]}"
+        return True, "النسخة الاحتياطية صحيحة"
+    finally:
+        os.remove(database_copy)
+
+
 class BackupWorker(QThread):
     """خيط العمل للنسخ الاحتياطي"""
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
     
-    def __init__(self, backup_path, db_path, include_files=True):
+    def __init__(self, backup_path, db_path, include_files=True,
+                 codec=config.BACKUP_ARCHIVE_CODEC):
         super().__init__()
         self.backup_path = backup_path
         self.db_path = db_path
         self.include_files = include_files
+        self.codec = codec
     
     def run(self):
+        database_copy = None
+        start = time.perf_counter()
         try:
             self.status.emit("بدء النسخ الاحتياطي...")
             self.progress.emit(10)
             
-            # إنشاء مجلد مؤقت
-            temp_dir = f"temp_backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            # نسخ قاعدة البيانات
+            # لقطة قاعدة البيانات في ملف مؤقت بجانب الأرشيف (واجهة النسخ في
+            # SQLite تكتب إلى ملف)، ثم تبث إلى الأرشيف وتحذف
             self.status.emit("نسخ قاعدة البيانات...")
-            shutil.copy2(self.db_path, os.path.join(temp_dir, 'database.db'))
-            self.progress.emit(30)
+            handle, database_copy = tempfile.mkstemp(
+                suffix='.db', dir=os.path.dirname(os.path.abspath(self.backup_path))
+            )
+            os.close(handle)
+            backup_database(
+                self.db_path, database_copy,
+                lambda done, total: self.progress.emit(10 + 30 * done // max(total, 1))
+            )
+            self.progress.emit(40)
             
-            # إنشاء ملف معلومات النسخة الاحتياطية
+            # معلومات النسخة الاحتياطية (تكتب في نهاية الأرشيف مع نسبة الضغط والزمن)
             backup_info = {
                 'created_at': datetime.datetime.now().isoformat(),
                 'version': '1.0',
-                'database_size': os.path.getsize(self.db_path),
-                'backup_type': 'full' if self.include_files else 'database_only'
+                'database_size': os.path.getsize(database_copy),
+                'backup_type': 'full' if self.include_files else 'database_only',
+                'codec': self.codec
             }
             
-            with open(os.path.join(temp_dir, 'backup_info.json'), 'w', encoding='utf-8') as f:
-                json.dump(backup_info, f, indent=2, ensure_ascii=False)
-            
-            self.progress.emit(50)
-            
-            # نسخ الملفات الإضافية إذا كانت مطلوبة
-            if self.include_files:
-                self.status.emit("نسخ الملفات الإضافية...")
-                
-                # نسخ ملفات الإعدادات
-                if os.path.exists('config.py'):
-                    shutil.copy2('config.py', os.path.join(temp_dir, 'config.py'))
+            with zipfile.ZipFile(self.backup_path, 'w', **zip_options(self.codec)) as zipf:
+                self.status.emit("ضغط قاعدة البيانات...")
+                database_digests = []
+                with open(database_copy, 'rb') as source:
+                    copy_stream(
+                        source, zipf.open('database.db', 'w', force_zip64=True),
+                        backup_info['database_size'],
+                        lambda done, total: self.progress.emit(40 + 40 * done // max(total, 1)),
+                        digests=database_digests
+                    )
+                backup_info['database_chunk_size'] = STREAM_CHUNK_SIZE
+                backup_info['database_sha256'] = database_digests
+                os.remove(database_copy)
+                database_copy = None
+                self.progress.emit(80)
                 
-                # نسخ مجلد الموارد
-                if os.path.exists('resources'):
-                    shutil.copytree('resources', os.path.join(temp_dir, 'resources'))
+                # إضافة الملفات الإضافية مباشرة من مواقعها إذا كانت مطلوبة
+                if self.include_files:
+                    self.status.emit("نسخ الملفات الإضافية...")
+                    
+                    # ملف الإعدادات
+                    if os.path.exists('config.py'):
+                        zipf.write('config.py', 'config.py')
+                    
+                    # مجلد الموارد
+                    for root, dirs, files in os.walk('resources'):
+                        for file in files:
+                            file_path = os.path.join(root, file)
+                            zipf.write(file_path, os.path.relpath(file_path))
                 
-                self.progress.emit(70)
-            
-            # ضغط النسخة الاحتياطية
-            self.status.emit("ضغط الملفات...")
-            with zipfile.ZipFile(self.backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arc_path = os.path.relpath(file_path, temp_dir)
-                        zipf.write(file_path, arc_path)
-            
-            self.progress.emit(90)
-            
-            # تنظيف الملفات المؤقتة
-            shutil.rmtree(temp_dir)
+                entries = zipf.infolist()
+                original_size = sum(entry.file_size for entry in entries)
+                compressed_size = sum(entry.compress_size for entry in entries)
+                backup_info.update({
+                    'original_size': original_size,
+                    'compressed_size': compressed_size,
+                    'compression_ratio': round(compressed_size / max(original_size, 1), 4),
+                    'seconds': round(time.perf_counter() - start, 3)
+                })
+                zipf.writestr(
+                    'backup_info.json',
+                    json.dumps(backup_info, indent=2, ensure_ascii=False)
+                )
             
             self.progress.emit(100)
             self.finished.emit(True, "تم إنشاء النسخة الاحتياطية بنجاح")
             
         except Exception as e:
             logging.error(f"خطأ في النسخ الاحتياطي: {str(e)}")
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
+            if os.path.exists(self.backup_path):
+                os.remove(self.backup_path)
             self.finished.emit(False, f"فشل في النسخ الاحتياطي: {str(e)}")
+        finally:
+            if database_copy and os.path.exists(database_copy):
+                os.remove(database_copy)
 
 
 class RestoreWorker(QThread):
-    """خيط العمل لاستعادة النسخة الاحتياطية"""
+    """
+    خيط العمل لاستعادة النسخة الاحتياطية
+    من أرشيف مضغوط، أو من مخزن النسخ التزايدية إذا مرر store (backup_path
+    عندها ملف وصف النسخة في المخزن)
+    """
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
     
-    def __init__(self, backup_path, db_path):
+    def __init__(self, backup_path, db_path, store=None):
         super().__init__()
         self.backup_path = backup_path
         self.db_path = db_path
+        self.store = store
+        self.database_copy = None
     
     def run(self):
         try:
             self.status.emit("بدء استعادة النسخة الاحتياطية...")
             self.progress.emit(10)
             
-            # إنشاء مجلد مؤقت
-            temp_dir = f"temp_restore_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            os.makedirs(temp_dir, exist_ok=True)
+            # قاعدة البيانات المستعادة في ملف مؤقت بجانب القاعدة الحالية
+            handle, self.database_copy = tempfile.mkstemp(
+                suffix='.db', dir=os.path.dirname(os.path.abspath(self.db_path))
+            )
+            os.close(handle)
             
-            # استخراج النسخة الاحتياطية
-            self.status.emit("استخراج الملفات...")
-            with zipfile.ZipFile(self.backup_path, 'r') as zipf:
-                zipf.extractall(temp_dir)
+            if self.store is not None:
+                self.restore_snapshot()
+            else:
+                self.restore_archive()
             
-            self.progress.emit(30)
+            self.progress.emit(100)
+            self.finished.emit(True, "تم استعادة النسخة الاحتياطية بنجاح")
             
-            # التحقق من صحة النسخة الاحتياطية
-            backup_info_path = os.path.join(temp_dir, 'backup_info.json')
-            if not os.path.exists(backup_info_path):
+        except Exception as e:
+            logging.error(f"خطأ في الاستعادة: {str(e)}")
+            self.finished.emit(False, f"فشل في الاستعادة: {str(e)}")
+        finally:
+            if os.path.exists(self.database_copy or ''):
+                os.remove(self.database_copy)
+    
+    def restore_database(self):
+        """استبدال قاعدة البيانات الحالية بالملف المستعاد بعد حفظ نسخة منها"""
+        # إنشاء نسخة احتياطية من قاعدة البيانات الحالية
+        current_db_backup = f"{self.db_path}.backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if os.path.exists(self.db_path):
+            backup_database(self.db_path, current_db_backup)
+        self.progress.emit(50)
+        
+        # استعادة قاعدة البيانات (الكتابة عبر SQLite تحافظ على ملف WAL متسقاً)
+        self.status.emit("استعادة قاعدة البيانات...")
+        backup_database(
+            self.database_copy, self.db_path,
+            lambda done, total: self.progress.emit(50 + 30 * done // max(total, 1))
+        )
+        self.progress.emit(80)
+    
+    def restore_snapshot(self):
+        """إعادة بناء قاعدة البيانات من نسخة الأساس والفروق في المخزن"""
+        backup_id = os.path.basename(self.backup_path)[:-len('.json')]
+        self.status.emit("إعادة بناء قاعدة البيانات...")
+        self.store.restore(
+            backup_id, self.database_copy,
+            lambda done, total: self.progress.emit(10 + 30 * done // max(total, 1))
+        )
+        self.progress.emit(40)
+        self.restore_database()
+    
+    def restore_archive(self):
+        """استعادة أرشيف مضغوط بالبث المباشر من مدخلاته"""
+        with zipfile.ZipFile(self.backup_path, 'r') as zipf:
+            # التحقق من صحة النسخة الاحتياطية دون استخراجها
+            file_list = zipf.namelist()
+            if 'backup_info.json' not in file_list:
                 raise Exception("ملف معلومات النسخة الاحتياطية مفقود")
-            
-            with open(backup_info_path, 'r', encoding='utf-8') as f:
-                backup_info = json.load(f)
-            
-            self.progress.emit(50)
-            
-            # إنشاء نسخة احتياطية من قاعدة البيانات الحالية
-            current_db_backup = f"{self.db_path}.backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            if os.path.exists(self.db_path):
-                shutil.copy2(self.db_path, current_db_backup)
-            
-            # استعادة قاعدة البيانات
-            self.status.emit("استعادة قاعدة البيانات...")
-            restored_db_path = os.path.join(temp_dir, 'database.db')
-            if os.path.exists(restored_db_path):
-                shutil.copy2(restored_db_path, self.db_path)
-            else:
+            if 'database.db' not in file_list:
                 raise Exception("ملف قاعدة البيانات غير موجود في النسخة الاحتياطية")
             
-            self.progress.emit(70)
+            backup_info = json.loads(zipf.read('backup_info.json').decode('utf-8'))
+            
+            # مسارات ملفات الموارد داخل مجلد الاستخراج (ترفض النسخة كاملة قبل أي
+            # كتابة إذا خرج أحدها عنه، مثل resources/../../x)
+            staging = f"resources.restore_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            staging_root = os.path.realpath(staging)
+            resources = {}
+            for name in file_list:
+                if not name.startswith('resources/') or name.endswith('/'):
+                    continue
+                target_path = os.path.realpath(
+                    os.path.join(staging, os.path.relpath(name, 'resources'))
+                )
+                if os.path.commonpath([staging_root, target_path]) != staging_root:
+                    raise Exception(f"مسار غير آمن في النسخة الاحتياطية: {name}")
+                resources[name] = target_path
+            
+            # بث قاعدة البيانات من الأرشيف إلى الملف المؤقت
+            self.status.emit("استخراج قاعدة البيانات...")
+            with open(self.database_copy, 'wb') as target:
+                copy_stream(
+                    zipf.open('database.db'), target,
+                    zipf.getinfo('database.db').file_size,
+                    lambda done, total: self.progress.emit(10 + 30 * done // max(total, 1)),
+                    close_target=False
+                )
+            self.progress.emit(40)
+            
+            self.restore_database()
             
-            # استعادة الملفات الإضافية
+            # استعادة الملفات الإضافية مباشرة من الأرشيف
             self.status.emit("استعادة الملفات الإضافية...")
             
             # استعادة ملف الإعدادات
-            config_path = os.path.join(temp_dir, 'config.py')
-            if os.path.exists(config_path):
-                shutil.copy2(config_path, 'config.py')
-            
-            # استعادة مجلد الموارد
-            resources_path = os.path.join(temp_dir, 'resources')
-            if os.path.exists(resources_path):
+            if 'config.py' in file_list:
+                with open('config.py', 'wb') as target:
+                    copy_stream(zipf.open('config.py'), target, close_target=False)
+            
+            # استعادة مجلد الموارد (يستخرج بجانبه ثم يستبدل به)
+            if resources:
+                for name, target_path in resources.items():
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    with open(target_path, 'wb') as target:
+                        copy_stream(zipf.open(name), target, close_target=False)
                 if os.path.exists('resources'):
                     shutil.rmtree('resources')
-                shutil.copytree(resources_path, 'resources')
-            
-            self.progress.emit(90)
-            
-            # تنظيف الملفات المؤقتة
-            shutil.rmtree(temp_dir)
-            
-            self.progress.emit(100)
-            self.finished.emit(True, "تم استعادة النسخة الاحتياطية بنجاح")
-            
-        except Exception as e:
-            logging.error(f"خطأ في الاستعادة: {str(e)}")
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-            self.finished.emit(False, f"فشل في الاستعادة: {str(e)}")
+                os.rename(staging, 'resources')
 
 
 class BackupManager:
@@ -196,6 +378,9 @@ class BackupManager:
         self.auto_backup_enabled = False
         self.backup_interval = 24  # ساعات
         self.backup_location = "backups"
+        # الضغط: للنسخ اليدوية (الأرشيف) وللنسخ التلقائية (المخزن التزايدي)
+        self.archive_codec = config.BACKUP_ARCHIVE_CODEC
+        self.auto_codec = config.BACKUP_AUTO_CODEC
         self.scheduler_thread = None
         
         # إنشاء مجلد النسخ الاحتياطية
@@ -203,6 +388,9 @@ class BackupManager:
         
         # تحميل الإعدادات
         self.load_settings()
+        
+        # مخزن النسخ التلقائية التزايدية (قاعدة البيانات فقط)
+        self.store = BackupStore(os.path.join(self.backup_location, 'store'))
     
     def load_settings(self):
         """تحميل إعدادات النسخ الاحتياطي"""
@@ -218,6 +406,11 @@ class BackupManager:
                     self.backup_interval = int(value)
                 elif key == 'backup_location':
                     self.backup_location = value
+                elif key in ('backup_archive_codec', 'backup_auto_codec'):
+                    if value in CODECS:
+                        setattr(self, key[len('backup_'):], value)
+                    else:
+                        logging.warning(f"خوارزمية ضغط غير معروفة في الإعدادات: {value}")
                     
         except Exception as e:
             logging.warning(f"تعذر تحميل إعدادات النسخ الاحتياطي: {str(e)}")
@@ -228,7 +421,9 @@ class BackupManager:
             settings = {
                 'backup_auto_enabled': str(self.auto_backup_enabled).lower(),
                 'backup_interval': str(self.backup_interval),
-                'backup_location': self.backup_location
+                'backup_location': self.backup_location,
+                'backup_archive_codec': self.archive_codec,
+                'backup_auto_codec': self.auto_codec
             }
             
             for key, value in settings.items():
@@ -267,7 +462,9 @@ class BackupManager:
         progress_dialog.show()
         
         # إنشاء خيط العمل
-        worker = BackupWorker(backup_path, self.db_manager.db_path, include_files)
+        worker = BackupWorker(
+            backup_path, self.db_manager.pool.db_path, include_files, self.archive_codec
+        )
         
         # ربط الإشارات
         worker.progress.connect(progress_dialog.setValue)
@@ -337,7 +534,8 @@ class BackupManager:
         progress_dialog.show()
         
         # إنشاء خيط العمل
-        worker = RestoreWorker(backup_path, self.db_manager.db_path)
+        store = self.store if self.store.is_manifest(backup_path) else None
+        worker = RestoreWorker(backup_path, self.db_manager.pool.db_path, store)
         
         # ربط الإشارات
         worker.progress.connect(progress_dialog.setValue)
@@ -402,22 +600,28 @@ class BackupManager:
             time.sleep(60)  # فحص كل دقيقة
     
     def _auto_backup_job(self):
-        """مهمة النسخ الاحتياطي التلقائي"""
+        """مهمة النسخ الاحتياطي التلقائي (نسخة تزايدية في المخزن)"""
+        snapshot = None
         try:
-            backup_filename = f"auto_backup_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
-            backup_path = os.path.join(self.backup_location, backup_filename)
-            
-            # إنشاء النسخة الاحتياطية
-            worker = BackupWorker(backup_path, self.db_manager.db_path, True)
-            worker.run()  # تشغيل مباشر بدون واجهة
-            
-            logging.info(f"تم إنشاء نسخة احتياطية تلقائية: {backup_path}")
+            # لقطة متسقة ثم تخزين المقاطع المتغيرة فقط
+            handle, snapshot = tempfile.mkstemp(suffix='.db', dir=self.store.root)
+            os.close(handle)
+            backup_database(self.db_manager.pool.db_path, snapshot)
+            manifest = self.store.create(snapshot, self.auto_codec)
+            
+            logging.info(
+                f"تم إنشاء نسخة احتياطية تلقائية: {manifest['id']} "
+                f"({manifest['new_chunks']} مقطع جديد، {manifest['new_bytes']} بايت)"
+            )
             
             # تنظيف النسخ القديمة
             self._cleanup_old_backups()
             
         except Exception as e:
             logging.error(f"فشل النسخ الاحتياطي التلقائي: {str(e)}")
+        finally:
+            if snapshot and os.path.exists(snapshot):
+                os.remove(snapshot)
     
     def _cleanup_old_backups(self, keep_count=10):
         """تنظيف النسخ الاحتياطية القديمة"""
@@ -435,6 +639,9 @@ class BackupManager:
             for file_path, _ in backup_files[keep_count:]:
                 os.remove(file_path)
                 logging.info(f"تم حذف النسخة الاحتياطية القديمة: {file_path}")
+            
+            # النسخ التزايدية (تحذف المقاطع التي لم تعد مستخدمة)
+            self.store.prune(config.BACKUP_KEEP_SNAPSHOTS)
                 
         except Exception as e:
             logging.error(f"فشل في تنظيف النسخ القديمة: {str(e)}")
@@ -454,9 +661,21 @@ class BackupManager:
                         'path': file_path,
                         'size': file_stats.st_size,
                         'created_at': datetime.datetime.fromtimestamp(file_stats.st_ctime),
-                        'is_auto': filename.startswith('auto_backup_')
+                        'is_auto': filename.startswith('auto_backup_'),
+                        'is_incremental': False
                     })
             
+            # النسخ التزايدية (الحجم هو ما أضافته النسخة إلى المخزن)
+            for manifest in self.store.manifests():
+                backups.append({
+                    'filename': manifest['id'],
+                    'path': self.store.manifest_path(manifest['id']),
+                    'size': manifest['new_bytes'],
+                    'created_at': datetime.datetime.fromisoformat(manifest['created_at']),
+                    'is_auto': True,
+                    'is_incremental': True
+                })
+            
             # ترتيب حسب تاريخ الإنشاء
             backups.sort(key=lambda x: x['created_at'], reverse=True)
             
@@ -468,6 +687,10 @@ class BackupManager:
     def delete_backup(self, backup_path):
         """حذف نسخة احتياطية"""
         try:
+            if self.store.is_manifest(backup_path):
+                self.store.delete(os.path.basename(backup_path)[:-len('.json')])
+                logging.info(f"تم حذف النسخة الاحتياطية: {backup_path}")
+                return True
             if os.path.exists(backup_path):
                 os.remove(backup_path)
                 logging.info(f"تم حذف النسخة الاحتياطية: {backup_path}")
@@ -479,6 +702,9 @@ class BackupManager:
     
     def validate_backup(self, backup_path):
         """التحقق من صحة النسخة الاحتياطية"""
+        if self.store.is_manifest(backup_path):
+            return self._validate_snapshot(backup_path)
+        
         try:
             with zipfile.ZipFile(backup_path, 'r') as zipf:
                 # فحص قائمة الملفات
@@ -500,7 +726,8 @@ class BackupManager:
                     if key not in backup_info:
                         return False, f"معلومة مفقودة في ملف المعلومات: {key}"
                 
-                return True, "النسخة الاحتياطية صحيحة"
+                # بصمات الدفعات وفحص سلامة نسخة مستعادة مؤقتة
+                return verify_archive_database(zipf, backup_info, self.backup_location)
                 
         except zipfile.BadZipFile:
             return False, "ملف النسخة الاحتياطية تالف"
@@ -508,3 +735,62 @@ class BackupManager:
             return False, "ملف معلومات النسخة الاحتياطية تالف"
         except Exception as e:
             return False, f"خطأ في فحص النسخة الاحتياطية: {str(e)}"
+    
+    def _validate_snapshot(self, manifest_path, verified=None):
+        """التحقق من سلسلة النسخة التزايدية ومقاطعها وسلامة قاعدة بياناتها"""
+        try:
+            backup_id = os.path.basename(manifest_path)[:-len('.json')]
+            return self.store.verify(backup_id, self.backup_location, verified)
+        except FileNotFoundError as e:
+            return False, f"ملف وصف مفقود في سلسلة النسخة: {os.path.basename(e.filename)}"
+        except (json.JSONDecodeError, KeyError):
+            return False, "ملف وصف النسخة الاحتياطية تالف"
+    
+    def verify_all_backups(self, days=None, progress=None):
+        """
+        التحقق من جميع النسخ الاحتياطية (أو نسخ آخر days يوماً) وتسجيل الفاشلة
+        يرجع قائمة (النسخة، سليمة، رسالة)، والمقاطع المشتركة بين النسخ التزايدية
+        يتحقق منها مرة واحدة
+        """
+        backups = self.get_backup_list()
+        if days is not None:
+            since = datetime.datetime.now() - datetime.timedelta(days=days)
+            backups = [backup for backup in backups if backup['created_at'] >= since]
+        
+        verified = set()
+        results = []
+        for index, backup in enumerate(backups):
+            if backup['is_incremental']:
+                ok, message = self._validate_snapshot(backup['path'], verified)
+            else:
+                ok, message = self.validate_backup(backup['path'])
+            if not ok:
+                logging.error(f"فشل التحقق من النسخة الاحتياطية {backup['filename']}: {message}")
+            results.append((backup, ok, message))
+            if progress:
+                progress(index + 1, len(backups))
+        
+        return results
+
+
+def main():
+    """التحقق من النسخ الاحتياطية من سطر الأوامر (رمز الخروج 1 عند وجود تالفة)"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Backup verification')
+    parser.add_argument('--verify-all', action='store_true', required=True,
+                        help='verify every backup and report failures')
+    parser.add_argument('--days', type=int, default=None,
+                        help='only backups created in the last N days')
+    args = parser.parse_args()
+    
+    results = BackupManager().verify_all_backups(args.days)
+    failures = [(backup, message) for backup, ok, message in results if not ok]
+    for backup, message in failures:
+        print(f"FAILED  {backup['filename']}: {message}")
+    print(f"{len(results) - len(failures)}/{len(results)} backups verified")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+مخزن النسخ الاحتياطية التزايدية
+تقسم لقطة قاعدة البيانات إلى مقاطع من الصفحات المتتالية ويخزن كل مقطع مرة
+واحدة باسم بصمته (SHA-256)، ولكل نسخة ملف وصف (manifest) يحتوي المقاطع
+كاملة (نسخة أساس) أو المقاطع المتغيرة عن النسخة السابقة فقط (نسخة فرق)
+
+البنية على القرص:
+    <root>/chunks/ab/abcdef...     مقاطع مضغوطة (البايت الأول يحدد طريقة الضغط)
+    <root>/manifests/<id>.json     وصف كل نسخة
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import config
+from utils.compression import compress_chunk, decompress_chunk
+
+MANIFEST_VERSION = '2.0'
+
+# قفل لكل مخزن مشترك بين كائنات BackupStore في العملية: إنشاء نسخة يكتب مقاطعها
+# قبل ملف وصفها، فلا يجوز أن يعمل تنظيف المقاطع بينهما فيحذفها
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _store_lock(root):
+    key = os.path.realpath(root)
+    with _locks_lock:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = threading.RLock()
+            _locks[key] = lock
+        return lock
+
+
+def sha256_hex(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def quick_check(database_path):
+    """PRAGMA quick_check على ملف قاعدة بيانات، ويرجع (سليمة، رسائل الفحص)"""
+    connection = sqlite3.connect(database_path)
+    try:
+        messages = [row[0] for row in connection.execute("PRAGMA quick_check")]
+    except sqlite3.DatabaseError as e:
+        # تلف في رأس الملف أو صفحات المخطط يمنع الفحص نفسه
+        return False, [str(e)]
+    finally:
+        connection.close()
+    return messages == ['ok'], messages
+
+
+def _write_atomic(path, data):
+    """كتابة ملف كاملاً أو عدم كتابته (ملف مؤقت ثم إعادة تسمية)"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class BackupStore:
+    """مخزن مقاطع بعنونة المحتوى مع نسخ أساس ونسخ فرق"""
+
+    def __init__(self, root):
+        self.root = root
+        self.chunks_dir = os.path.join(root, 'chunks')
+        self.manifests_dir = os.path.join(root, 'manifests')
+        self._lock = _store_lock(root)
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    # المقاطع
+
+    def chunk_path(self, digest):
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def has_chunk(self, digest):
+        return os.path.exists(self.chunk_path(digest))
+
+    def put_chunk(self, data, codec):
+        """تخزين مقطع إن لم يكن موجوداً، ويرجع (البصمة، الحجم المكتوب أو 0)"""
+        digest = sha256_hex(data)
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = compress_chunk(codec, data)
+        _write_atomic(path, compressed)
+        return digest, len(compressed)
+
+    def get_chunk(self, digest):
+        with open(self.chunk_path(digest), 'rb') as f:
+            return decompress_chunk(f.read())
+
+    def check_chunk(self, digest):
+        """هل المقطع موجود ويطابق محتواه بعد فك الضغط بصمته"""
+        try:
+            return sha256_hex(self.get_chunk(digest)) == digest
+        except Exception:
+            # ملف مفقود أو ضغط تالف
+            return False
+
+    # ملفات الوصف
+
+    def manifest_path(self, backup_id):
+        return os.path.join(self.manifests_dir, f"{backup_id}.json")
+
+    def is_manifest(self, path):
+        """هل المسار ملف وصف في هذا المخزن"""
+        return (os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.manifests_dir)
+                and path.endswith('.json'))
+
+    def load(self, backup_id):
+        with open(self.manifest_path(backup_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, manifest):
+        data = json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8')
+        _write_atomic(self.manifest_path(manifest['id']), data)
+
+    def backup_ids(self):
+        """معرفات النسخ من الأقدم إلى الأحدث"""
+        return sorted(
+            name[:-5] for name in os.listdir(self.manifests_dir)
+            if name.endswith('.json')
+        )
+
+    def manifests(self):
+        return [self.load(backup_id) for backup_id in self.backup_ids()]
+
+    def chain(self, backup_id):
+        """سلسلة النسخ من نسخة الأساس حتى النسخة المطلوبة"""
+        chain = []
+        while backup_id is not None:
+            manifest = self.load(backup_id)
+            chain.append(manifest)
+            backup_id = manifest['parent']
+        return chain[::-1]
+
+    def resolve(self, backup_id):
+        """قائمة بصمات مقاطع النسخة كاملة بالترتيب (الأساس ثم الفروق)"""
+        chunks = {}
+        for manifest in self.chain(backup_id):
+            chunks.update(manifest['chunks'])
+        manifest = self.load(backup_id)
+        return [chunks[str(index)] for index in range(manifest['chunk_count'])]
+
+    # إنشاء واستعادة
+
+    def create(self, snapshot_path, codec, progress=None):
+        """
+        إضافة نسخة من لقطة قاعدة بيانات متسقة (ملف لا يكتب فيه أثناء القراءة)
+        تكون نسخة فرق عن أحدث نسخة إلا كل config.BACKUP_FULL_EVERY نسخة
+        codec: خوارزمية ضغط المقاطع الجديدة (انظر utils.compression.CODECS)
+        """
+        with self._lock:
+            start = time.perf_counter()
+            connection = sqlite3.connect(snapshot_path)
+            try:
+                page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+            finally:
+                connection.close()
+            chunk_size = page_size * config.BACKUP_CHUNK_PAGES
+            database_size = os.path.getsize(snapshot_path)
+            chunk_count = -(-database_size // chunk_size)
+
+            ids = self.backup_ids()
+            parent = ids[-1] if ids else None
+            previous = []
+            if parent is not None:
+                chain = self.chain(parent)
+                if len(chain) >= config.BACKUP_FULL_EVERY or chain[-1]['chunk_size'] != chunk_size:
+                    parent = None
+                else:
+                    previous = self.resolve(parent)
+
+            chunks = {}
+            new_chunks = new_bytes = raw_bytes = 0
+            with open(snapshot_path, 'rb') as f:
+                for index in range(chunk_count):
+                    data = f.read(chunk_size)
+                    digest, written = self.put_chunk(data, codec)
+                    if written:
+                        new_chunks += 1
+                        new_bytes += written
+                        raw_bytes += len(data)
+                    if index >= len(previous) or previous[index] != digest:
+                        chunks[str(index)] = digest
+                    if progress:
+                        progress(index + 1, chunk_count)
+
+            now = datetime.datetime.now()
+            manifest = {
+                'id': now.strftime('%Y%m%d_%H%M%S_%f'),
+                'created_at': now.isoformat(),
+                'version': MANIFEST_VERSION,
+                'backup_type': 'incremental' if parent else 'base',
+                'parent': parent,
+                'page_size': page_size,
+                'chunk_size': chunk_size,
+                'chunk_count': chunk_count,
+                'database_size': database_size,
+                'new_chunks': new_chunks,
+                'new_bytes': new_bytes,
+                'codec': codec,
+                # نسبة ضغط المقاطع الجديدة (None إذا لم يتغير شيء)
+                'compression_ratio': round(new_bytes / raw_bytes, 4) if raw_bytes else None,
+                'seconds': round(time.perf_counter() - start, 3),
+                'chunks': chunks
+            }
+            self.save(manifest)
+            return manifest
+
+    def restore(self, backup_id, target_path, progress=None):
+        """إعادة بناء ملف قاعدة البيانات للنسخة من الأساس والفروق"""
+        chunks = self.resolve(backup_id)
+        with open(target_path, 'wb') as f:
+            for index, digest in enumerate(chunks):
+                f.write(self.get_chunk(digest))
+                if progress:
+                    progress(index + 1, len(chunks))
+
+    def verify(self, backup_id, temp_dir=None, verified=None):
+        """
+        التحقق من إمكانية استعادة النسخة: بصمات المقاطع على خيوط متوازية ثم
+        PRAGMA quick_check على نسخة مستعادة مؤقتة، ويرجع (سليمة، رسالة)
+        verified: مجموعة مقاطع سبق التحقق منها فتتخطى (تضاف إليها السليمة)
+        """
+        chunks = self.resolve(backup_id)
+        verified = set() if verified is None else verified
+        pending = sorted(set(chunks) - verified)
+        with ThreadPoolExecutor(config.BACKUP_VERIFY_WORKERS) as pool:
+            results = list(pool.map(self.check_chunk, pending))
+        damaged = [digest for digest, ok in zip(pending, results) if not ok]
+        if damaged:
+            return False, f"مقاطع تالفة أو مفقودة في المخزن: {len(damaged)}"
+        verified.update(pending)
+
+        handle, database_copy = tempfile.mkstemp(suffix='.db', dir=temp_dir or self.root)
+        os.close(handle)
+        try:
+            self.restore(backup_id, database_copy)
+            ok, messages = quick_check(database_copy)
+        finally:
+            os.remove(database_copy)
+        if not ok:
+            return False, f"فشل فحص سلامة قاعدة البيانات المستعادة: {messages[0]}"
+        return True, "النسخة الاحتياطية صحيحة"
+
+    # الحذف والتنظيف
+
+    def delete(self, backup_id, collect=True):
+        """
+        حذف نسخة مع الحفاظ على النسخ المبنية عليها: تدمج فروقها في كل نسخة
+        تالية تعتمد عليها (فتصبح التالية نسخة أساس إذا حذف الأساس)
+        """
+        with self._lock:
+            manifest = self.load(backup_id)
+            for child in self.manifests():
+                if child['parent'] != backup_id:
+                    continue
+                merged = {
+                    index: digest for index, digest in manifest['chunks'].items()
+                    if int(index) < child['chunk_count']
+                }
+                merged.update(child['chunks'])
+                child['chunks'] = merged
+                child['parent'] = manifest['parent']
+                if child['parent'] is None:
+                    child['backup_type'] = 'base'
+                self.save(child)
+
+            os.remove(self.manifest_path(backup_id))
+            if collect:
+                self.collect_garbage()
+
+    def prune(self, keep_count):
+        """حذف أقدم النسخ مع الإبقاء على آخر keep_count نسخة"""
+        with self._lock:
+            ids = self.backup_ids()
+            for backup_id in ids[:max(len(ids) - keep_count, 0)]:
+                self.delete(backup_id, collect=False)
+            self.collect_garbage()
+
+    def collect_garbage(self):
+        """حذف المقاطع التي لا تشير إليها أي نسخة، ويرجع عددها"""
+        with self._lock:
+            referenced = set()
+            for manifest in self.manifests():
+                referenced.update(manifest['chunks'].values())
+
+            removed = 0
+            for prefix in os.listdir(self.chunks_dir):
+                directory = os.path.join(self.chunks_dir, prefix)
+                for name in os.listdir(directory):
+                    if name not in referenced:
+                        os.remove(os.path.join(directory, name))
+                        removed += 1
+            return removed
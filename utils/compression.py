@@ -0,0 +1,135 @@
+"""
+خوارزميات الضغط المتاحة للنسخ الاحتياطية
+تستخدم في الأرشيفات المضغوطة (zip) وفي مقاطع مخزن النسخ التزايدية، ويختار
+كل نوع من إعدادات BackupManager
+
+قياس الأداء على قاعدة البيانات الحالية:
+    python -m utils.compression [--limit-mb 64]
+"""
+
+import bz2
+import lzma
+import time
+import zipfile
+import zlib
+
+# الخوارزميات: الاسم -> (الطريقة، المستوى)
+CODECS = {
+    'stored': ('stored', None),
+    'deflate-1': ('deflate', 1),
+    'deflate-6': ('deflate', 6),
+    'deflate-9': ('deflate', 9),
+    'bz2': ('bz2', 9),
+    'lzma': ('lzma', 6)
+}
+
+# الطريقة -> (رمز المقطع، نوع zipfile، الضغط، فك الضغط)
+_METHODS = {
+    'stored': (0, zipfile.ZIP_STORED, lambda data, level: data, lambda data: data),
+    'deflate': (1, zipfile.ZIP_DEFLATED, zlib.compress, zlib.decompress),
+    'bz2': (2, zipfile.ZIP_BZIP2, bz2.compress, bz2.decompress),
+    'lzma': (3, zipfile.ZIP_LZMA,
+             lambda data, level: lzma.compress(data, preset=level), lzma.decompress)
+}
+
+_TAGS = {tag: method for method, (tag, *rest) in _METHODS.items()}
+
+
+def _method(codec):
+    if codec not in CODECS:
+        raise ValueError(f"خوارزمية ضغط غير معروفة: {codec}")
+    return CODECS[codec]
+
+
+def zip_options(codec):
+    """معاملات zipfile.ZipFile للخوارزمية (compression و compresslevel)"""
+    method, level = _method(codec)
+    return {'compression': _METHODS[method][1], 'compresslevel': level}
+
+
+def compress_chunk(codec, data):
+    """ضغط مقطع مع بايت أول يحدد الطريقة (لفك الضغط دون معرفة الخوارزمية)"""
+    method, level = _method(codec)
+    tag, zip_type, compress, decompress = _METHODS[method]
+    return bytes([tag]) + compress(data, level)
+
+
+def decompress_chunk(blob):
+    """فك ضغط مقطع كتبه compress_chunk"""
+    return _METHODS[_TAGS[blob[0]]][3](blob[1:])
+
+
+def benchmark(data, chunk_size, codecs=None):
+    """
+    قياس نسبة الضغط وسرعته لكل خوارزمية على البيانات مقسمة إلى مقاطع
+    يرجع قائمة (الاسم، النسبة، ميغابايت/ث للضغط، ميغابايت/ث لفك الضغط)
+    """
+    chunks = [data[offset:offset + chunk_size] for offset in range(0, len(data), chunk_size)]
+    megabytes = len(data) / (1024 * 1024)
+    results = []
+    for codec in codecs or CODECS:
+        start = time.perf_counter()
+        blobs = [compress_chunk(codec, chunk) for chunk in chunks]
+        compress_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for blob in blobs:
+            decompress_chunk(blob)
+        decompress_time = time.perf_counter() - start
+
+        ratio = sum(len(blob) for blob in blobs) / max(len(data), 1)
+        results.append((
+            codec,
+            ratio,
+            megabytes / max(compress_time, 1e-9),
+            megabytes / max(decompress_time, 1e-9)
+        ))
+    return results
+
+
+def format_benchmark(results):
+    """تنسيق نتائج القياس كنص للعرض"""
+    lines = [f"{'codec':<10} {'ratio':>7} {'compress MB/s':>14} {'decompress MB/s':>16}"]
+    for codec, ratio, compress_speed, decompress_speed in results:
+        lines.append(
+            f"{codec:<10} {ratio:>7.3f} {compress_speed:>14.1f} {decompress_speed:>16.1f}"
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    """قياس الخوارزميات على لقطة من قاعدة البيانات الحالية"""
+    import argparse
+    import os
+    import sqlite3
+    import tempfile
+    import config
+    from database.connection_pool import connect
+
+    parser = argparse.ArgumentParser(description='Backup compression benchmark')
+    parser.add_argument('--limit-mb', type=int, default=64,
+                        help='maximum megabytes of the database to sample')
+    args = parser.parse_args()
+
+    handle, snapshot = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    try:
+        source = connect(config.DATABASE_PATH)
+        target = sqlite3.connect(snapshot)
+        source.backup(target)
+        page_size = target.execute("PRAGMA page_size").fetchone()[0]
+        target.close()
+        source.close()
+
+        with open(snapshot, 'rb') as f:
+            data = f.read(args.limit_mb * 1024 * 1024)
+    finally:
+        os.remove(snapshot)
+
+    chunk_size = page_size * config.BACKUP_CHUNK_PAGES
+    print(f"{len(data) / (1024 * 1024):.1f} MB in {chunk_size // 1024} KB chunks")
+    print(format_benchmark(benchmark(data, chunk_size)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+تصدير البيانات إلى Excel أو CSV بالبث من قاعدة البيانات
+تقرأ الصفوف من المؤشر وتكتب على دفعات في خيط عمل منفصل، دون تحميل
+البيانات كاملة في الذاكرة
+"""
+
+import csv
+import itertools
+import logging
+import os
+import re
+from PyQt6.QtWidgets import QMessageBox, QProgressDialog
+from PyQt6.QtCore import QThread, pyqtSignal
+from database.connection_pool import get_pool
+from database.db_manager import DatabaseManager
+from utils.translations import tr
+
+# عدد الصفوف المكتوبة بين كل تحديث للتقدم وفحص للإلغاء
+CHUNK_SIZE = 1000
+
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+class CsvExportWriter:
+    """كتابة ملف CSV (الأوراق المتعددة تكتب متتالية بعناوين واحدة)"""
+
+    def __init__(self, file_path):
+        self.file = open(file_path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+        self.has_headers = False
+
+    def add_sheet(self, title, headers):
+        if not self.has_headers:
+            self.writer.writerow(headers)
+            self.has_headers = True
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ExcelExportWriter:
+    """كتابة ملف Excel بوضع الكتابة فقط (write-only) في openpyxl"""
+
+    def __init__(self, file_path):
+        from openpyxl import Workbook
+
+        self.file_path = file_path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.titles = set()
+
+    def _sheet_title(self, title):
+        """اسم ورقة صالح وغير مكرر (31 حرفاً كحد أقصى)"""
+        base = _INVALID_SHEET_CHARS.sub('_', str(title or 'Sheet'))[:31]
+        candidate = base
+        for number in itertools.count(2):
+            if candidate.lower() not in self.titles:
+                break
+            suffix = f" ({number})"
+            candidate = base[:31 - len(suffix)] + suffix
+        self.titles.add(candidate.lower())
+        return candidate
+
+    def add_sheet(self, title, headers):
+        self.sheet = self.workbook.create_sheet(self._sheet_title(title))
+        self.sheet.append(headers)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        if self.sheet is None:
+            self.workbook.create_sheet()
+        self.workbook.save(self.file_path)
+
+
+def open_writer(file_path):
+    """إنشاء كاتب التصدير المناسب لامتداد الملف"""
+    if file_path.lower().endswith('.csv'):
+        return CsvExportWriter(file_path)
+    return ExcelExportWriter(file_path)
+
+
+class ExportWorker(QThread):
+    """
+    خيط العمل للتصدير
+    job: دالة تستقبل DatabaseManager خاصاً بالخيط وترجع (عدد الصفوف، الأوراق)
+    حيث كل ورقة (العنوان، رؤوس الأعمدة، الصفوف كمكرر)
+    """
+    progress = pyqtSignal(int)
+    status = pyqtSignal(str)
+    finished = pyqtSignal(bool, str)
+
+    def __init__(self, file_path, job):
+        super().__init__()
+        self.file_path = file_path
+        self.job = job
+        self.cancelled = False
+
+    def cancel(self):
+        """طلب إيقاف التصدير (يتوقف عند نهاية الدفعة الحالية)"""
+        self.cancelled = True
+
+    def run(self):
+        pool = get_pool()
+        writer = None
+        try:
+            # اتصال خاص بهذا الخيط من المجمع
+            total, sheets = self.job(DatabaseManager())
+            writer = open_writer(self.file_path)
+            written = 0
+
+            for title, headers, rows in sheets:
+                self.status.emit(str(title))
+                writer.add_sheet(title, headers)
+                rows = iter(rows)
+                while True:
+                    if self.cancelled:
+                        raise InterruptedError
+                    chunk = list(itertools.islice(rows, CHUNK_SIZE))
+                    if not chunk:
+                        break
+                    writer.write_rows(chunk)
+                    written += len(chunk)
+                    self.progress.emit(min(99, written * 100 // max(total, 1)))
+
+            writer.close()
+            writer = None
+            self.progress.emit(100)
+            self.finished.emit(True, self.file_path)
+
+        except InterruptedError:
+            self.finished.emit(False, '')
+        except Exception as e:
+            logging.error(f"خطأ في التصدير: {str(e)}")
+            self.finished.emit(False, str(e))
+        finally:
+            if writer is not None:
+                # حذف الملف الجزئي بعد الإلغاء أو الخطأ
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+                if os.path.exists(self.file_path):
+                    os.remove(self.file_path)
+            pool.release()
+
+
+def run_export(parent, file_path, job, language='ar'):
+    """
+    تشغيل التصدير في الخلفية مع نافذة تقدم قابلة للإلغاء
+    يجب أن يحتفظ المستدعي بالخيط المرجع حتى انتهائه
+    """
+    progress_dialog = QProgressDialog(
+        tr('exporting', language),
+        tr('cancel', language),
+        0, 100,
+        parent
+    )
+    progress_dialog.setWindowTitle(tr('export', language))
+    progress_dialog.setModal(True)
+    progress_dialog.setAutoClose(False)
+    progress_dialog.setAutoReset(False)
+    progress_dialog.show()
+
+    worker = ExportWorker(file_path, job)
+    worker.progress.connect(progress_dialog.setValue)
+    worker.status.connect(
+        lambda title: progress_dialog.setLabelText(f"{tr('exporting', language)} {title}")
+    )
+    progress_dialog.canceled.connect(worker.cancel)
+    worker.finished.connect(lambda success, message: _on_export_finished(
+        worker, success, message, progress_dialog, parent, language
+    ))
+    worker.start()
+    return worker
+
+
+def _on_export_finished(worker, success, message, progress_dialog, parent, language):
+    """معالجة انتهاء التصدير"""
+    progress_dialog.close()
+
+    if success:
+        QMessageBox.information(
+            parent,
+            tr('success', language),
+            tr('export_success', language)
+        )
+    elif worker.cancelled:
+        QMessageBox.information(
+            parent,
+            tr('info', language),
+            tr('export_cancelled', language)
+        )
+    else:
+        QMessageBox.critical(
+            parent,
+            tr('error', language),
+            message
+        )
@@ -0,0 +1,133 @@
+"""
+قياس زمن بدء التشغيل (python main.py --profile-startup)
+يسجل زمن استيراد كل وحدة وزمن إنشاء كل صفحة وزمن أول رسم للنوافذ،
+ويطبع التقرير عند إغلاق البرنامج
+
+لا تستورد هذه الوحدة Qt عند تحميلها حتى يمكن تفعيلها قبل أي استيراد آخر
+"""
+
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+# عدد الوحدات المعروضة في التقرير (الأبطأ استيراداً)
+TOP_IMPORTS = 30
+
+_profiler = None
+
+
+class StartupProfiler:
+    """تسجيل أزمنة بدء التشغيل"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.imports = {}
+        self.timings = []
+        self.marks = []
+        self._children = []
+        self._original_import = None
+
+    def install(self):
+        """بدء قياس الاستيراد بتغليف __import__"""
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # قياس أول استيراد مطلق فقط، والنسبي يحسب ضمن الوحدة الأم
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            # (الزمن الكلي، الزمن الذاتي دون الوحدات المستوردة داخلها)
+            self.imports.setdefault(name, (elapsed, elapsed - children))
+
+    def elapsed(self):
+        """الزمن منذ بدء القياس بالثواني"""
+        return time.perf_counter() - self.start
+
+    def record(self, kind, name, seconds):
+        self.timings.append((kind, name, seconds))
+
+    def mark(self, name):
+        """تسجيل حدث بزمنه منذ بدء التشغيل"""
+        self.marks.append((name, self.elapsed()))
+
+    def report(self):
+        """نص التقرير"""
+        lines = [f"Imports (top {TOP_IMPORTS} by self time, ms):"]
+        lines.append(f"  {'self':>8} {'total':>8}  module")
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (total, own) in slowest[:TOP_IMPORTS]:
+            lines.append(f"  {own * 1000:8.1f} {total * 1000:8.1f}  {name}")
+        total_imports = sum(own for total, own in self.imports.values())
+        lines.append(f"  {total_imports * 1000:8.1f} {'':>8}  ({len(self.imports)} modules)")
+
+        lines.append('')
+        lines.append('Construction (ms):')
+        for kind, name, seconds in self.timings:
+            lines.append(f"  {seconds * 1000:8.1f}  {kind} {name}")
+
+        lines.append('')
+        lines.append('Since start (ms):')
+        for name, seconds in self.marks:
+            lines.append(f"  {seconds * 1000:8.1f}  {name}")
+        return '\n'.join(lines)
+
+
+def enable():
+    """تفعيل القياس (يستدعى قبل استيراد بقية البرنامج)"""
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler()
+        _profiler.install()
+    return _profiler
+
+
+def get_profiler():
+    """المقياس الفعال أو None إذا لم يفعل"""
+    return _profiler
+
+
+@contextmanager
+def measure(kind, name):
+    """قياس زمن كتلة برمجية (لا يفعل شيئاً إذا لم يفعل القياس)"""
+    if _profiler is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _profiler.record(kind, name, time.perf_counter() - start)
+
+
+def watch_first_paint(widget, name):
+    """تسجيل زمن أول رسم للنافذة منذ بدء التشغيل"""
+    if _profiler is None:
+        return
+    from PyQt6.QtCore import QObject, QEvent
+
+    class _FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                _profiler.mark(f"first paint: {name}")
+                obj.removeEventFilter(self)
+            return False
+
+    # الاحتفاظ بالمرشح مع النافذة حتى لا يحذفه جامع البيانات المهملة
+    widget._first_paint_filter = _FirstPaintFilter(widget)
+    widget.installEventFilter(widget._first_paint_filter)
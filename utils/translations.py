@@ -22,6 +22,17 @@ translations = {
         'search': 'بحث',
         'refresh': 'تحديث',
         'export': 'تصدير',
+        'exporting': 'جاري التصدير...',
+        'export_success': 'تم التصدير بنجاح',
+        'export_cancelled': 'تم إلغاء التصدير',
+        'export_grades': 'تصدير الدرجات',
+        'all_classes': 'جميع الصفوف',
+        'export_scope': 'نطاق التصدير',
+        'export_current_filters': 'الصف والمادة المحددان',
+        'sheets': 'الأوراق',
+        'single_sheet': 'ورقة واحدة',
+        'sheet_per_subject': 'ورقة لكل مادة',
+        'sheet_per_exam': 'ورقة لكل امتحان',
         'import': 'استيراد',
         'print': 'طباعة',
         'today': 'اليوم',
@@ -41,6 +52,24 @@ translations = {
         'total': 'المجموع',
         'statistics': 'إحصائيات',
         
+        # لوحة التحكم
+        'weekly_attendance': 'نسبة الحضور اليومية',
+        'grades_distribution': 'توزيع التقديرات (الفصل الحالي)',
+        'recent_activities': 'آخر الأنشطة',
+        'no_recent_activity': 'لا توجد أنشطة حديثة',
+        'band_excellent': 'ممتاز',
+        'band_very_good': 'جيد جداً',
+        'band_good': 'جيد',
+        'band_pass': 'مقبول',
+        'band_fail': 'راسب',
+        'activity_students_added': '✅ تم إضافة {count} طالب جديد',
+        'activity_teachers_added': '👨‍🏫 تم إضافة {count} معلم جديد',
+        'activity_classes_added': '🏫 تم إضافة {count} صف جديد',
+        'activity_subjects_added': '📚 تم إضافة {count} مادة جديدة',
+        'activity_exams_added': '📝 تم إضافة {count} امتحان جديد',
+        'activity_grades_entered': '📊 تم رصد {count} درجة في {name}',
+        'activity_attendance_taken': '📅 تم تسجيل حضور {count} طالب في {name}',
+        
         # المستخدمون
         'username': 'اسم المستخدم',
         'password': 'كلمة المرور',
@@ -72,6 +101,9 @@ translations = {
         'student_updated': 'تم تحديث الطالب بنجاح',
         'student_deleted': 'تم حذف الطالب بنجاح',
         'confirm_delete_student': 'هل أنت متأكد من حذف هذا الطالب؟',
+        'view_details': 'عرض التفاصيل',
+        'select_student_first': 'يرجى تحديد طالب أولاً',
+        'showing_students': 'عرض {visible} من أصل {total} طالب',
         
         # المعلمون
         'teachers': 'المعلمون',
@@ -289,6 +321,7 @@ translations = {
         
         # AI المساعد
         'ai_assistant': 'المساعد الذكي',
+        'page_unavailable': 'تعذر فتح هذه الصفحة',
         'ask_question': 'اطرح سؤالاً',
         'ai_response': 'استجابة المساعد',
         'ai_analyzing': 'المساعد يحلل البيانات...',
@@ -319,6 +352,17 @@ translations = {
         'search': 'Search',
         'refresh': 'Refresh',
         'export': 'Export',
+        'exporting': 'Exporting...',
+        'export_success': 'Export completed successfully',
+        'export_cancelled': 'Export cancelled',
+        'export_grades': 'Export Grades',
+        'all_classes': 'All Classes',
+        'export_scope': 'Export Scope',
+        'export_current_filters': 'Selected class and subject',
+        'sheets': 'Sheets',
+        'single_sheet': 'Single sheet',
+        'sheet_per_subject': 'One sheet per subject',
+        'sheet_per_exam': 'One sheet per exam',
         'import': 'Import',
         'print': 'Print',
         'today': 'Today',
@@ -338,6 +382,24 @@ translations = {
         'total': 'Total',
         'statistics': 'Statistics',
         
+        # Dashboard
+        'weekly_attendance': 'Daily Attendance Rate',
+        'grades_distribution': 'Grade Distribution (Current Term)',
+        'recent_activities': 'Recent Activities',
+        'no_recent_activity': 'No recent activity',
+        'band_excellent': 'Excellent',
+        'band_very_good': 'Very Good',
+        'band_good': 'Good',
+        'band_pass': 'Pass',
+        'band_fail': 'Fail',
+        'activity_students_added': '✅ {count} new student(s) added',
+        'activity_teachers_added': '👨‍🏫 {count} new teacher(s) added',
+        'activity_classes_added': '🏫 {count} new class(es) added',
+        'activity_subjects_added': '📚 {count} new subject(s) added',
+        'activity_exams_added': '📝 {count} new exam(s) added',
+        'activity_grades_entered': '📊 {count} grade(s) entered for {name}',
+        'activity_attendance_taken': '📅 Attendance recorded for {count} student(s) in {name}',
+        
         # Users
         'username': 'Username',
         'password': 'Password',
@@ -369,6 +431,9 @@ translations = {
         'student_updated': 'Student updated successfully',
         'student_deleted': 'Student deleted successfully',
         'confirm_delete_student': 'Are you sure you want to delete this student?',
+        'view_details': 'View Details',
+        'select_student_first': 'Please select a student first',
+        'showing_students': 'Showing {visible} of {total} students',
         
         # Teachers
         'teachers': 'Teachers',
@@ -586,6 +651,7 @@ translations = {
         
         # AI Assistant
         'ai_assistant': 'AI Assistant',
+        'page_unavailable': 'This page could not be opened',
         'ask_question': 'Ask a Question',
         'ai_response': 'AI Response',
         'ai_analyzing': 'AI is analyzing data...',